@@ -0,0 +1,159 @@
+from z3 import *
+import sys
+import json
+import time
+import signal
+import argparse
+import multiprocessing
+from metrics import Metrics
+from graph_coloring import colorGraph
+from graph_clique_coverage import findCliques
+from parity_game_solving import solveParity
+
+#
+# Batch runner for solving many instances in parallel.
+#
+# The instances are read as JSON lines, one instance per line:
+#
+#   {"id": "g1", "problem": "coloring", "edges": [[1,2],[2,3]], "colors": 3}
+#   {"id": "g2", "problem": "cliques", "edges": [[1,2],[2,3]], "cliques": 2}
+#   {"id": "p1", "problem": "parity", "edges": [[1,2],[2,1]],
+#    "initial": 1, "eloise": [1], "omega": {"1": 0, "2": 1}}
+#
+# An optional "options" object is passed on to the entry point as keyword
+# arguments, e.g. {"encoding": "sequential"}.
+#
+# The instances are fanned out over a pool of worker processes.  Z3 uses
+# one global context per process, so threads would serialize on it; every
+# worker is a separate process with a context of its own.  The workers
+# are spawned rather than forked so that they never inherit the context
+# of the parent.  Results are written back as JSON lines in the order the
+# instances complete, with the "id" of the instance, the solution status
+# ("found", "nonexistent", "error" or "timeout"), the solution itself and
+# the wall time.
+#
+# With a timeout, Z3 gives up on the check after the given number of
+# seconds (reported by the entry points as "error" and turned into
+# "timeout" here), and an alarm interrupts the Python side of the work
+# a second later.
+#
+
+PROBLEMS = ("coloring", "cliques", "parity")
+
+
+class InstanceTimeout(Exception):
+    pass
+
+
+def alarmHandler(signum, frame):
+    raise InstanceTimeout()
+
+
+def initWorker(timeout):
+    if timeout is not None:
+        set_param("timeout", int(timeout * 1000))
+        signal.signal(signal.SIGALRM, alarmHandler)
+
+
+def solveInstance(instance, withMetrics = False):
+    problem = instance["problem"]
+    options = instance.get("options", {})
+    metrics = Metrics() if withMetrics else None
+    if problem == "coloring":
+        edges = [tuple(e) for e in instance["edges"]]
+        (result, solution) = colorGraph(edges, instance["colors"], None,
+                                        metrics = metrics, **options)
+    elif problem == "cliques":
+        edges = [tuple(e) for e in instance["edges"]]
+        (result, solution) = findCliques(edges, instance["cliques"], None,
+                                         metrics = metrics, **options)
+    elif problem == "parity":
+        edges = [list(e) for e in instance["edges"]]
+        omega = dict([(int(v), o) for (v, o) in instance["omega"].items()])
+        (result, strategy) = solveParity(edges, instance["initial"],
+                                         list(instance["eloise"]), omega, None,
+                                         metrics = metrics, **options)
+        solution = dict([(str(v), w) for (v, w) in strategy.items()])
+    else:
+        raise ValueError("Unknown problem %r, expected one of %s"
+                         % (problem, ", ".join(PROBLEMS)))
+    return (result, solution, metrics)
+
+
+# Run one instance in a worker, never raises
+
+def runInstance(args):
+    (index, instance, timeout, withMetrics) = args
+    row = {"id": instance.get("id", index), "problem": instance.get("problem")}
+    start = time.perf_counter()
+    if timeout is not None:
+        signal.alarm(int(timeout) + 1)
+    try:
+        (result, solution, metrics) = solveInstance(instance, withMetrics)
+        if result == "error" and timeout is not None and \
+           time.perf_counter() - start >= timeout:
+            result = "timeout"
+        row["result"] = result
+        row["solution"] = solution
+        if metrics is not None:
+            row["metrics"] = metrics.asDict()
+    except InstanceTimeout:
+        row["result"] = "timeout"
+    except Exception as e:
+        row["result"] = "error"
+        row["error"] = "%s: %s" % (type(e).__name__, e)
+    finally:
+        if timeout is not None:
+            signal.alarm(0)
+    row["time"] = time.perf_counter() - start
+    return row
+
+
+def readInstances(lines):
+    for line in lines:
+        line = line.strip()
+        if line != "":
+            yield json.loads(line)
+
+
+#
+# Solve the given instances on a pool of worker processes and yield the
+# result rows in completion order.  processes defaults to the number of
+# cores, timeout is in seconds per instance.
+#
+def runBatch(instances, processes = None, timeout = None, withMetrics = False,
+             chunksize = 1):
+    tasks = ((index, instance, timeout, withMetrics)
+             for (index, instance) in enumerate(instances))
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(processes, initWorker, (timeout,)) as pool:
+        for row in pool.imap_unordered(runInstance, tasks, chunksize):
+            yield row
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Solve a batch of instances in parallel")
+    parser.add_argument("input", nargs = "?", default = "-",
+                        help = "JSON lines file of instances, - for stdin")
+    parser.add_argument("-o", "--output", default = "-")
+    parser.add_argument("-j", "--processes", type = int, default = None)
+    parser.add_argument("-t", "--timeout", type = float, default = None,
+                        help = "seconds per instance")
+    parser.add_argument("--metrics", action = "store_true",
+                        help = "include per-phase metrics in the results")
+    args = parser.parse_args(argv)
+
+    inp = sys.stdin if args.input == "-" else open(args.input)
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for row in runBatch(readInstances(inp), args.processes, args.timeout,
+                            args.metrics):
+            out.write(json.dumps(row)+"\n")
+            out.flush()
+    finally:
+        if inp is not sys.stdin: inp.close()
+        if out is not sys.stdout: out.close()
+
+
+if __name__ == "__main__":
+    main()
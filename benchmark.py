@@ -0,0 +1,337 @@
+from z3 import *
+import sys
+import csv
+import json
+import time
+import argparse
+import cardinality
+import instances
+from metrics import Metrics
+from graph_coloring import colorGraph, COLOR_ENCODINGS
+from graph_clique_coverage import findCliques, maximalCliques, BACKENDS
+from graph import Graph
+from majority_minority_voting import findVotes, COUNTINGS
+from bounded_model_checking import solveWithBMC, solveWithIncrementalBMC
+from parity_game_solving import solveParity
+
+#
+# Benchmarks for the solver modules.
+#
+# "python benchmark.py sweep" runs every problem family over a range of
+# instance sizes and seeds, times the encoding, solving and decoding
+# phases of each run separately and reports the scaling curves (mean
+# times per family and size) as JSON or CSV.  The JSON report also has
+# the formula sizes and solver statistics of every run.  Options given with
+# "-o key=value" are passed on to the entry points, e.g. "-o encoding=native".
+#
+# "python benchmark.py encodings" compares the cardinality encodings of
+# cardinality.ENCODINGS on instance sizes we actually meet: many colors,
+# BMC runs with several buckets (B^2 pour selectors per step) and parity
+# games with high out-degree Eloise nodes.
+#
+# "python benchmark.py colors" compares the color encodings of
+# graph_coloring.COLOR_ENCODINGS as the number of colors grows, and
+# "python benchmark.py cliques" the backends of findCliques.
+#
+# "python benchmark.py votes" compares the counting modes of findVotes on
+# electorates of 10^3 to 10^5 persons.
+#
+
+def timed(f, *args, **kwargs):
+    start = time.perf_counter()
+    result = f(*args, **kwargs)
+    return (result, time.perf_counter() - start)
+
+
+#
+# The problem families.  Each family has default sizes to sweep, a
+# generator making an instance of a given size from a seed, and a runner
+# calling the entry point on an instance.  Runners return the solution
+# status ("found", "nonexistent", "not found" or "error").
+#
+
+def runColoring(nofColors):
+    def run(edges, options, metrics):
+        return colorGraph(edges, nofColors, None, metrics = metrics, **options)[0]
+    return run
+
+def runCliques(edges, options, metrics):
+    nofCliques = max(1, len(edges) // 3)
+    return findCliques(edges, nofCliques, None, metrics = metrics, **options)[0]
+
+def runVoting(instance, options, metrics):
+    (majorities, minorities) = instance
+    return findVotes(majorities, minorities, None, metrics = metrics, **options)[0]
+
+# The BMC runs measure the SAT engine unless "-o engine=..." says otherwise,
+# the explicit-state search would answer the small instances by itself
+
+def runBMC(solve, maxBound):
+    def run(instance, options, metrics):
+        options = dict(options)
+        options.setdefault("engine", "sat")
+        return solve(instance, maxBound, None, metrics = metrics, **options)
+    return run
+
+def runParity(instance, options, metrics):
+    (edges, initialNode, eNodes, omega) = instance
+    return solveParity(edges, initialNode, list(eNodes), omega, None,
+                       metrics = metrics, **options)[0]
+
+FAMILIES = {
+    "coloring-er": ([20, 40, 80, 160],
+                    lambda n, seed: instances.erdosRenyiGraph(n, 8.0/n, seed),
+                    runColoring(4)),
+    "coloring-geometric": ([20, 40, 80, 160],
+                           lambda n, seed: instances.geometricGraph(n, 1.5/n**0.5, seed),
+                           runColoring(4)),
+    "cliques-er": ([6, 8, 10, 12],
+                   lambda n, seed: instances.erdosRenyiGraph(n, 0.4, seed),
+                   runCliques),
+    "cliques-geometric": ([6, 8, 10, 12],
+                          lambda n, seed: instances.geometricGraph(n, 0.5, seed),
+                          runCliques),
+    "voting": ([20, 40, 80, 160],
+               lambda n, seed: instances.overlappingGroups(n, n // 4, 7, seed),
+               runVoting),
+    "bmc": ([2, 3, 4],
+            lambda n, seed: instances.bucketInstance(n, 9, seed),
+            runBMC(solveWithBMC, 8)),
+    "bmc-incremental": ([2, 3, 4, 5],
+                        lambda n, seed: instances.bucketInstance(n, 9, seed),
+                        runBMC(solveWithIncrementalBMC, 8)),
+    "parity-random": ([20, 40, 80, 160],
+                      lambda n, seed: instances.randomParityGame(n, 3, seed),
+                      runParity),
+    "parity-ladder": ([10, 20, 40, 80],
+                      lambda n, seed: instances.ladderParityGame(n, seed),
+                      runParity),
+}
+
+PHASES = ["encode", "solve", "decode"]
+
+
+def runOne(family, size, seed, options = {}):
+    (sizes, make, run) = FAMILIES[family]
+    instance = make(size, seed)
+    metrics = Metrics()
+    (result, total) = timed(run, instance, options, metrics)
+    row = {"family": family, "size": size, "seed": seed, "result": result,
+           "total": total}
+    for phase in PHASES:
+        row[phase] = metrics.phaseTime(phase)
+    row["sizing"] = metrics.sizing
+    row["formulas"] = metrics.formulaSizes()
+    row["statistics"] = dict(metrics.statistics)
+    row["info"] = dict(metrics.info)
+    row.update(options)
+    return row
+
+
+def sweep(families = None, sizes = None, seeds = [0, 1, 2], options = {}):
+    rows = []
+    for family in (families or sorted(FAMILIES.keys())):
+        for size in (sizes or FAMILIES[family][0]):
+            for seed in seeds:
+                rows.append(runOne(family, size, seed, options))
+    return rows
+
+
+# Mean phase times per family and size, in sweep order
+
+def scalingCurves(rows):
+    curves = []
+    for row in rows:
+        if curves == [] or (curves[-1]["family"], curves[-1]["size"]) != \
+                           (row["family"], row["size"]):
+            curves.append({"family": row["family"], "size": row["size"],
+                           "runs": 0, "total": 0.0,
+                           "encode": 0.0, "solve": 0.0, "decode": 0.0,
+                           "results": {}})
+        curve = curves[-1]
+        curve["runs"] += 1
+        for key in ["total"] + PHASES:
+            curve[key] += row[key]
+        curve["results"][row["result"]] = curve["results"].get(row["result"], 0) + 1
+    for curve in curves:
+        for key in ["total"] + PHASES:
+            curve[key] /= curve["runs"]
+    return curves
+
+
+def writeReport(rows, fmt, out):
+    report = {"runs": rows, "curves": scalingCurves(rows)}
+    if fmt == "json":
+        json.dump(report, out, indent = 2)
+        out.write("\n")
+    else:
+        fields = ["family", "size", "runs", "total"] + PHASES
+        writer = csv.writer(out)
+        writer.writerow(fields)
+        for curve in report["curves"]:
+            writer.writerow([curve[f] for f in fields])
+
+
+# Size of the encoding of a single "exactly one" constraint
+
+def exactlyOneSize(n, encoding):
+    xs = [Bool("x_%d" % i) for i in range(n)]
+    g = Goal()
+    g.add(cardinality.exactlyOneFormula(xs, encoding))
+    if encoding != "native":
+        g = Tactic("tseitin-cnf")(g)[0]
+    return len(g)
+
+
+def compareEncodings(out = sys.stdout, seed = 0):
+
+    def p(txt):
+        if out: out.write(txt+'\n')
+
+    p("Constraints after clausification of a single exactly-one constraint:")
+    p("%-12s" % "n" + "".join(["%12s" % e for e in cardinality.ENCODINGS]))
+    for n in [10, 40, 100, 400]:
+        sizes = [exactlyOneSize(n, e) for e in cardinality.ENCODINGS]
+        p("%-12d" % n + "".join(["%12d" % size for size in sizes]))
+
+    p("")
+    p("Seconds per solve:")
+    edges = instances.erdosRenyiGraph(60, 0.3, seed)
+    game = instances.randomParityGame(40, 16, seed)
+    runs = [
+        ("colorGraph 60 nodes, 40 colors", edges, runColoring(40)),
+        ("colorGraph 60 nodes, 8 colors", edges, runColoring(8)),
+        ("solveWithIncrementalBMC [3,5,8,11,13], 6", ([3,5,8,11,13], 6),
+         runBMC(solveWithIncrementalBMC, 8)),
+        ("solveParity 40 nodes", game, runParity),
+    ]
+    for (name, instance, run) in runs:
+        row = "%-44s" % name
+        for encoding in cardinality.ENCODINGS:
+            (result, secs) = timed(run, instance, {"encoding": encoding}, None)
+            row += "  %s %.3f" % (encoding, secs)
+        p(row)
+
+
+def compareColorEncodings(out = sys.stdout, seed = 0):
+
+    def p(txt):
+        if out: out.write(txt+'\n')
+
+    p("Seconds per phase, the one-hot encoding with the default pairwise exactly-one:")
+    p("%-34s%-8s%10s%10s" % ("instance", "", "encode", "solve"))
+    for (nofNodes, radius) in [(40, 0.3), (60, 0.3)]:
+        edges = instances.geometricGraph(nofNodes, radius, seed)
+        for nofColors in [8, 16, 32, 64]:
+            name = "%d nodes, %d edges, %d colors" % (nofNodes, len(edges), nofColors)
+            for colorEncoding in COLOR_ENCODINGS:
+                metrics = Metrics(sizeFormulas = False)
+                (result, data) = colorGraph(edges, nofColors, None, metrics = metrics,
+                                            colorEncoding = colorEncoding)
+                p("%-34s%-8s%10.3f%10.3f  %s"
+                  % (name, colorEncoding, metrics.phaseTime("encode"),
+                     metrics.phaseTime("solve"), result))
+                name = ""
+
+
+def compareCliqueBackends(out = sys.stdout, seed = 0, timeout = 10):
+
+    def p(txt):
+        if out: out.write(txt+'\n')
+
+    # Covering with one clique less than there are maximal cliques is
+    # usually unsat, which the membership encoding can take very long to
+    # prove, so every check is cut off after timeout seconds ("e")
+    set_param("timeout", timeout*1000)
+    try:
+        p("Seconds per solve, covering with all maximal cliques and with fewer:")
+        p("%-40s" % "instance" + "".join(["%12s" % b for b in BACKENDS]))
+        for (nofNodes, radius) in [(20, 0.3), (40, 0.2), (80, 0.12), (160, 0.08)]:
+            edges = instances.geometricGraph(nofNodes, radius, seed)
+            edges = [(min(e), max(e)) for e in edges]
+            nofMaximal = len(maximalCliques(Graph(edges)))
+            for nofCliques in [k for k in [nofMaximal, nofMaximal-1] if k >= 1]:
+                row = "%-40s" % ("%d nodes, %d edges, %d cliques"
+                                 % (nofNodes, len(edges), nofCliques))
+                for backend in BACKENDS:
+                    ((result, cliques), secs) = timed(findCliques, edges, nofCliques,
+                                                      None, backend = backend)
+                    row += "%12s" % ("%.3f %s" % (secs, result[0]))
+                p(row)
+    finally:
+        set_param("timeout", 4294967295)
+
+
+# The counters spell out about group size x threshold constraints per
+# group, modes are skipped on instances where that is out of reach
+
+COUNTER_BUDGET = 10**6
+
+def compareCountings(out = sys.stdout, seed = 0):
+
+    def p(txt):
+        if out: out.write(txt+'\n')
+
+    p("Seconds per solve, 40 overlapping groups of 1/20 of the persons:")
+    p("%-20s" % "persons" + "".join(["%16s" % c for c in COUNTINGS]))
+    for nofPersons in [1000, 10000, 100000]:
+        (majorities, minorities) = instances.overlappingGroups(nofPersons, 40,
+                                                               nofPersons // 20, seed)
+        counterSize = sum([len(g)*(len(g)//2+1) for g in majorities+minorities])
+        row = "%-20d" % nofPersons
+        for counting in COUNTINGS:
+            if counting != "native" and counterSize > COUNTER_BUDGET:
+                row += "%16s" % "-"
+                continue
+            ((result, votes), secs) = timed(findVotes, majorities, minorities, None,
+                                            counting = counting)
+            row += "%16s" % ("%.3f %s" % (secs, result))
+        p(row)
+
+
+def parseOption(text):
+    (key, value) = text.split("=", 1)
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+    return (key, value)
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark the solver modules")
+    commands = parser.add_subparsers(dest = "command")
+    sweepCmd = commands.add_parser("sweep", help = "sweep instance sizes and report scaling curves")
+    sweepCmd.add_argument("-f", "--family", action = "append", choices = sorted(FAMILIES.keys()))
+    sweepCmd.add_argument("-s", "--size", action = "append", type = int)
+    sweepCmd.add_argument("--seeds", type = int, default = 3)
+    sweepCmd.add_argument("-o", "--option", action = "append", default = [],
+                          help = "key=value passed to the entry points")
+    sweepCmd.add_argument("--format", choices = ["json", "csv"], default = "json")
+    sweepCmd.add_argument("--output", default = "-")
+    commands.add_parser("encodings", help = "compare the cardinality encodings")
+    commands.add_parser("colors", help = "compare the color encodings")
+    commands.add_parser("cliques", help = "compare the clique cover backends")
+    commands.add_parser("votes", help = "compare the counting modes of findVotes")
+    args = parser.parse_args(argv)
+
+    if args.command == "sweep":
+        options = dict([parseOption(o) for o in args.option])
+        rows = sweep(args.family, args.size, list(range(args.seeds)), options)
+        if args.output == "-":
+            writeReport(rows, args.format, sys.stdout)
+        else:
+            with open(args.output, "w", newline = "") as out:
+                writeReport(rows, args.format, out)
+    elif args.command == "colors":
+        compareColorEncodings()
+    elif args.command == "cliques":
+        compareCliqueBackends()
+    elif args.command == "votes":
+        compareCountings()
+    else:
+        compareEncodings()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 from z3 import *
 import sys
-# STUDENTS: do not add or modify import statements!
+import multiprocessing
+import multiprocessing.connection
+import numpy as np
+from cardinality import exactlyOneFormula
+from metrics import ensureMetrics
 
 #
 # Some auxiliary functions are defined first, it is probably a good idea
@@ -47,33 +51,20 @@ def createActionSelectors(i, nofBuckets):
     return (fillsAtI, emptiesAtI, poursAtI)
 
 
-#
-# Return a formula that evaluates to true if and only if
-# exactly one of the argument formulas evaluates to true.
-# This is a straightforward, quadratic construction; better ones do exist.
-#
-def exactlyOneFormula(formulas):
-    if len(formulas) == 0: return False
-    if len(formulas) == 1: return formulas[0]
-    atLeastOne = Or(formulas)
-    atLeastTwo = Or([And(f1,f2) for f1 in formulas for f2 in formulas if f2 is not f1])
-    # Note: we have to use "is not" instead of "!=" above because
-    # f2 != f1 would be a Z3 formula "f2 != f1" and here we want to check
-    # whether f2 is not the same as f1
-    return And(atLeastOne, Not(atLeastTwo))
-
-
 #
 # Return a formula that evaluates to true if and only if
 # exactly one of the action selector vars in actionSelectorsAtI does.
 # This basically only takes care of the fact that poursAtI is
-# a 2-dimensional array while fillsAtI and emptiesAtI are 1-dimensional.
+# a 2-dimensional array while fillsAtI and emptiesAtI are 1-dimensional,
+# and that the diagonal of poursAtI holds the constant False.
+# The encoding is one of cardinality.ENCODINGS.
 #
-def exactlyOneActionFormula(actionSelectorsAtI):
+def exactlyOneActionFormula(actionSelectorsAtI, encoding = "pairwise"):
     (fillsAtI,emptiesAtI,poursAtI) = actionSelectorsAtI
     actionsAtI = fillsAtI + emptiesAtI
-    for b1 in range(0, len(poursAtI)): actionsAtI += poursAtI[b1]
-    return exactlyOneFormula(actionsAtI)
+    for b1 in range(0, len(poursAtI)):
+        actionsAtI += [poursAtI[b1][b2] for b2 in range(0, len(poursAtI)) if b1 != b2]
+    return exactlyOneFormula(actionsAtI, encoding)
 
 
 #
@@ -89,11 +80,12 @@ def initialStateFormula(bucketVarsAtI):
 # Make and return the goal constraint stating that
 # one of the buckets contains the correct (goal) liters of water.
 #
-def goalStateFormula(bucketVarsAtI, goal):
+def goalStateFormula(bucketVarsAtI, goal, encoding = "pairwise"):
     assert(len(bucketVarsAtI) >= 1)
     assert(isinstance(goal, int) and goal >= 0)
     # INSERT YOUR CODE HERE and replace "True" with the real thing
-    return exactlyOneFormula([(bucketVar == goal) for bucketVar in bucketVarsAtI])
+    return exactlyOneFormula([(bucketVar == goal) for bucketVar in bucketVarsAtI],
+                             encoding)
 
 
 #
@@ -230,46 +222,517 @@ def printSolution(bucketCapacities, goal, varDecls, bound, model, out = sys.stdo
 
 
 
-def solveWithBMC(instance, maxBound, out = sys.stdout):
+#
+# Explicit-state breadth-first search (engine "bfs").
+#
+# A state is packed into one integer in mixed radix: the amount of water
+# in bucket b is digit b, of radix bucketCapacities[b]+1, so the states
+# are the integers 0..stateSpaceSize-1 and the initial state is 0.  The
+# search keeps an array with one entry per state, the packed predecessor
+# of the state or -1 for a state not yet visited, and expands the states
+# layer by layer with the fill, empty and pour actions of stepFormula.
+# A layer is expanded with NumPy: the successors of all its states under
+# one action are computed as one array operation on the packed states.
+# The first layer with a goal state (exactly one bucket holding goal
+# liters, as in goalStateFormula) gives the shortest plan, i.e. the
+# bound at which the first BMC encoding is SAT.  The trace is followed
+# back through the predecessors and validated by printSolution, with
+# the state and action variables of that bound fixed to the trace.
+#
+# The BMC entry points use the search with engine "auto" when the array
+# of predecessors fits in BFS_MEMORY_BUDGET bytes, see useBFS.
+#
+
+ENGINES = ("auto", "sat", "bfs")
+
+BFS_MEMORY_BUDGET = 2**24
+
+def stateSpaceSize(bucketCapacities):
+    size = 1
+    for capacity in bucketCapacities:
+        size *= capacity+1
+    return size
+
+# The type of the packed states
+
+def stateType(bucketCapacities):
+    return np.int32 if stateSpaceSize(bucketCapacities) < 2**31 else np.int64
+
+def useBFS(bucketCapacities, engine, memoryBudget = BFS_MEMORY_BUDGET):
+    assert(engine in ENGINES)
+    if engine == "auto":
+        itemSize = np.dtype(stateType(bucketCapacities)).itemsize
+        return stateSpaceSize(bucketCapacities)*itemSize <= memoryBudget
+    return engine == "bfs"
+
+def unpackState(code, bucketCapacities):
+    state = []
+    for capacity in bucketCapacities:
+        (code, amount) = divmod(code, capacity+1)
+        state.append(amount)
+    return state
+
+# The actions enabled in a state, with the states they lead to
+
+def moves(state, bucketCapacities):
+    nofBuckets = len(bucketCapacities)
+    result = []
+    for b in range(0, nofBuckets):
+        result.append((("fill", b), state[:b] + [bucketCapacities[b]] + state[b+1:]))
+        result.append((("empty", b), state[:b] + [0] + state[b+1:]))
+    for b in range(0, nofBuckets):
+        for b2 in range(0, nofBuckets):
+            if b != b2:
+                poured = min(state[b], bucketCapacities[b2] - state[b2])
+                nextState = list(state)
+                nextState[b] -= poured
+                nextState[b2] += poured
+                result.append((("pour", b, b2), nextState))
+    return result
+
+
+def solveWithBFS(instance, maxBound, out = sys.stdout, metrics = None):
     assert(isinstance(maxBound, int) and maxBound >= 1)
+    metrics = ensureMetrics(metrics)
     (bucketCapacities, goal) = instance
     assert(len(bucketCapacities) >= 1)
-    assert(isinstance(goal, int))
+    assert(isinstance(goal, int) and goal >= 0)
     nofBuckets = len(bucketCapacities)
 
     def p(txt):
         if out: out.write(txt+'\n')
 
+    size = stateSpaceSize(bucketCapacities)
+    dtype = stateType(bucketCapacities)
+    radices = [stateSpaceSize(bucketCapacities[:b]) for b in range(0, nofBuckets)]
+
+    metrics.startPhase("solve")
+    p("Searching the %d states breadth-first" % size)
+    predecessor = np.full(size, -1, dtype = dtype)
+    predecessor[0] = 0
+    layer = np.zeros(1, dtype = dtype)
+    bound = 1
+    visited = 1
+    reached = None
+    while True:
+        states = [(layer // radices[b]) % (bucketCapacities[b]+1) for b in range(0, nofBuckets)]
+        goals = np.nonzero(sum([(state == goal).astype(np.int8) for state in states]) == 1)[0]
+        if len(goals) > 0:
+            reached = int(layer[goals[0]])
+            break
+        if bound == maxBound:
+            break
+        successors = []
+        for b in range(0, nofBuckets):
+            successors.append(layer + (bucketCapacities[b] - states[b])*radices[b])
+            successors.append(layer - states[b]*radices[b])
+            for b2 in range(0, nofBuckets):
+                if b != b2:
+                    poured = np.minimum(states[b], bucketCapacities[b2] - states[b2])
+                    successors.append(layer + poured*(radices[b2] - radices[b]))
+        parents = np.tile(layer, len(successors))
+        successors = np.concatenate(successors)
+        fresh = predecessor[successors] == -1
+        (nextLayer, first) = np.unique(successors[fresh], return_index = True)
+        if len(nextLayer) == 0:
+            break
+        predecessor[nextLayer] = parents[fresh][first]
+        visited += len(nextLayer)
+        layer = nextLayer
+        bound += 1
+    metrics.setInfo("visitedStates", visited)
+
+    if reached is None:
+        p("No goal state within %d states of the initial one" % maxBound)
+        metrics.endPhase()
+        return "not found"
+
+    # Follow the predecessors back to the initial state
+    metrics.startPhase("decode")
+    trace = [reached]
+    while trace[-1] != 0:
+        trace.append(int(predecessor[trace[-1]]))
+    trace = [unpackState(code, bucketCapacities) for code in reversed(trace)]
+    p("The shortest plan has %d states" % len(trace))
+
+    # Fix the variables of that bound to the trace for printSolution
+    bucketsAt = [createBucketVars(i, nofBuckets) for i in range(1, bound+1)]
+    actionSelectorsAt = [createActionSelectors(i, nofBuckets) for i in range(1, bound)]
+    s = Solver()
+    for i in range(1, bound+1):
+        for b in range(0, nofBuckets):
+            s.add(bucketsAt[i-1][b] == trace[i-1][b])
+    for i in range(1, bound):
+        action = [a for (a, nextState) in moves(trace[i-1], bucketCapacities)
+                  if nextState == trace[i]][0]
+        (fillsAtI, emptiesAtI, poursAtI) = actionSelectorsAt[i-1]
+        if action[0] == "fill":
+            selected = fillsAtI[action[1]]
+        elif action[0] == "empty":
+            selected = emptiesAtI[action[1]]
+        else:
+            selected = poursAtI[action[1]][action[2]]
+        for var in actionVars([actionSelectorsAt[i-1]]):
+            s.add(var if var.eq(selected) else Not(var))
+    assert(s.check() == sat)
+    p("The bucket capacities are: "+str(bucketCapacities))
+    p("The goal is: "+str(goal))
+    p("The solution is:")
+    printSolution(bucketCapacities, goal, (bucketsAt, actionSelectorsAt), bound,
+                  s.model(), out)
+
+    metrics.endPhase()
+    return "found"
+
+
+#
+# Bound schedules (schedule in solveWithBMC).
+#
+# Without a schedule every bound from 1 to maxBound gets an encoding of
+# its own, built from scratch.  With one, a single encoding is kept and
+# extended by the new steps only (BMCEncoding below), and the bounds are
+# visited in the order of the schedule:
+#
+# - "linear":   1, 2, 3, ... as without a schedule
+# - "doubling": 1, 2, 4, 8, ... up to maxBound, and once a bound is SAT,
+#               bisection between it and the last UNSAT bound
+#
+# The goal of bound k is reached by Boolean goal_by_k, which implies
+# that the goal holds in one of the states 1..k.  Checking bound k
+# assumes goal_by_k, so a bound is SAT iff there is a plan of at most k
+# states and SAT is monotone in the bound.  The bisection then ends with
+# the shortest plan, and its model reaches the goal exactly in the last
+# state.  The steps beyond the bound checked always have a model (a
+# bucket can always be filled), so they need not be retracted.
+#
+
+BOUND_SCHEDULES = ("linear", "doubling")
+
+def goalBy(i):
+    return Bool("goal_by_%d" % (i))
+
+class BMCEncoding:
+    def __init__(self, bucketCapacities, goal, encoding, metrics):
+        self.bucketCapacities = bucketCapacities
+        self.goal = goal
+        self.encoding = encoding
+        self.metrics = metrics
+        self.bucketsAt = [createBucketVars(1, len(bucketCapacities))]
+        self.actionSelectorsAt = []
+        self.s = Solver()
+        self.s.add(metrics.formula("initialStateFormula",
+                                   initialStateFormula(self.bucketsAt[0])))
+        self.s.add(metrics.formula("goalStateFormula",
+                                   Implies(goalBy(1), goalStateFormula(self.bucketsAt[0],
+                                                                       goal, encoding))))
+
+    def bound(self):
+        return len(self.bucketsAt)
+
+    # Add the steps up to the given bound
+
+    def extend(self, bound):
+        metrics = self.metrics
+        nofBuckets = len(self.bucketCapacities)
+        while self.bound() < bound:
+            i = self.bound()
+            actionSelectorsAtI = createActionSelectors(i, nofBuckets)
+            self.actionSelectorsAt.append(actionSelectorsAtI)
+            self.bucketsAt.append(createBucketVars(i+1, nofBuckets))
+            self.s.add(metrics.formula("exactlyOneActionFormula",
+                                       exactlyOneActionFormula(actionSelectorsAtI,
+                                                               self.encoding)))
+            self.s.add(metrics.formula("stepFormula",
+                                       stepFormula(self.bucketCapacities, self.bucketsAt[i-1],
+                                                   actionSelectorsAtI, self.bucketsAt[i])))
+            self.s.add(metrics.formula("goalStateFormula",
+                                       Implies(goalBy(i+1),
+                                               Or(goalBy(i),
+                                                  goalStateFormula(self.bucketsAt[i],
+                                                                   self.goal, self.encoding)))))
+
+    def check(self, bound):
+        return self.s.check(goalBy(bound))
+
+    def varDecls(self):
+        return (self.bucketsAt, self.actionSelectorsAt)
+
+
+def solveWithScheduledBMC(instance, maxBound, out, encoding, metrics, schedule):
+    (bucketCapacities, goal) = instance
+
+    def p(txt):
+        if out: out.write(txt+'\n')
+
+    metrics.startPhase("encode")
+    p("Getting the encoding for bound 1")
+    bmc = BMCEncoding(bucketCapacities, goal, encoding, metrics)
+    unsatBound = 0    # The largest bound known to be UNSAT
+    satBound = None   # The smallest bound known to be SAT, and its model
+    satModel = None
+    checked = []
+    bound = 1
     solution = None
 
-    for bound in range(1, maxBound+1):
-        p("Getting the encoding for bound "+str(bound))
+    while True:
+        metrics.startPhase("encode")
+        if bound > bmc.bound():
+            p("Getting the encoding for bound "+str(bound))
+            bmc.extend(bound)
 
-        # Bucket variables for all states
-        bucketsAt = [createBucketVars(i, nofBuckets) for i in range(1, bound+1)]
-        actionSelectorsAt = [createActionSelectors(i, nofBuckets) for i in range(1, bound)]
+        p("Solving the encoding for bound %d" % bound)
+        metrics.startPhase("solve")
+        result = bmc.check(bound)
+        metrics.solverStatistics(bmc.s)
+        metrics.startPhase("decode")
+        p("Done, the result is: "+str(result))
+        checked.append(bound)
 
-        # Create the solver instance
-        s = Solver()
+        if result == unsat:
+            unsatBound = bound
+        elif result == sat:
+            (satBound, satModel) = (bound, bmc.s.model())
+        else:
+            assert(result == unknown)
+            p('"unknown" (with reason "'+bmc.s.reason_unknown()+'") returned by the solver, aborting')
+            solution = "error"
+            break
+
+        if satBound is not None and satBound == unsatBound+1:
+            # Yes, a shortest solution found!
+            p("The bucket capacities are: "+str(bucketCapacities))
+            p("The goal is: "+str(goal))
+            p("The solution is:")
+            printSolution(bucketCapacities, goal, bmc.varDecls(), satBound, satModel, out)
+            solution = "found"
+            break
+        elif satBound is None and unsatBound == maxBound:
+            solution = "not found"
+            break
+        elif satBound is not None:
+            bound = (unsatBound+satBound)//2
+        elif schedule == "doubling":
+            bound = min(2*bound, maxBound)
+        else:
+            bound += 1
+
+    metrics.setInfo("checkedBounds", checked)
+    metrics.endPhase()
+    return solution
+
+
+#
+# The encoding of a single bound: a solver with the initial state, the
+# steps and the goal in the last state, and the variables of the states
+# and the actions.
+#
 
-        # Force the initial state to be legal
-        s.add(initialStateFormula(bucketsAt[1-1]))
+def boundEncoding(bucketCapacities, goal, bound, encoding, metrics):
+    nofBuckets = len(bucketCapacities)
+
+    # Bucket variables for all states
+    bucketsAt = [createBucketVars(i, nofBuckets) for i in range(1, bound+1)]
+    actionSelectorsAt = [createActionSelectors(i, nofBuckets) for i in range(1, bound)]
+
+    # Create the solver instance
+    s = Solver()
+
+    # Force the initial state to be legal
+    s.add(metrics.formula("initialStateFormula", initialStateFormula(bucketsAt[1-1])))
+
+    # Force the last state to be a goal state
+    s.add(metrics.formula("goalStateFormula",
+                           goalStateFormula(bucketsAt[bound-1], goal, encoding)))
+
+    # Must take exactly one action
+    for i in range(1, bound):
+        s.add(metrics.formula("exactlyOneActionFormula",
+                               exactlyOneActionFormula(actionSelectorsAt[i-1], encoding)))
 
-        # Force the last state to be a goal state
-        s.add(goalStateFormula(bucketsAt[bound-1], goal))
+    # Encode the actions
+    for i in range(1, bound):
+        s.add(metrics.formula("stepFormula",
+                              stepFormula(bucketCapacities, bucketsAt[i-1],
+                                          actionSelectorsAt[i-1], bucketsAt[i-1+1])))
 
-        # Must take exactly one action
-        for i in range(1, bound):
-            s.add(exactlyOneActionFormula(actionSelectorsAt[i-1]))
+    return (s, bucketsAt, actionSelectorsAt)
 
-        # Encode the actions
-        for i in range(1, bound):
-            s.add(stepFormula(bucketCapacities,
-                              bucketsAt[i-1], actionSelectorsAt[i-1], bucketsAt[i-1+1]))
+
+#
+# Parallel bound portfolio (processes in solveWithBMC).
+#
+# The bounds are checked at the same time, each in a worker process of
+# its own (and so with a Z3 context of its own), the shallowest pending
+# bounds first and at most the given number at a time.  As soon as a
+# bound is SAT, the workers of the deeper bounds are terminated and no
+# deeper bound is started; the answer is the shallowest SAT bound once
+# all the bounds below it are UNSAT, as when the bounds are checked one
+# after another.  Every worker sends its result through a pipe of its
+# own, so a terminated worker cannot leave anything half-written behind.
+#
+# A worker returns the values of the state and action variables of its
+# model.  They are fixed in the encoding of that bound in the main
+# process, whose model is then printed and validated by printSolution.
+#
+
+def checkBound(bucketCapacities, goal, bound, encoding, connection):
+    (s, bucketsAt, actionSelectorsAt) = boundEncoding(bucketCapacities, goal, bound,
+                                                      encoding, ensureMetrics(None))
+    result = s.check()
+    if result == sat:
+        model = s.model()
+        values = [(str(var), model.eval(var, model_completion = True).as_long())
+                  for bucketsAtI in bucketsAt for var in bucketsAtI]
+        values += [(str(var), is_true(model.eval(var, model_completion = True)))
+                   for var in actionVars(actionSelectorsAt)]
+        connection.send((bound, "sat", values))
+    elif result == unsat:
+        connection.send((bound, "unsat", None))
+    else:
+        connection.send((bound, "unknown", s.reason_unknown()))
+    connection.close()
+
+# The action selector variables of all the steps, without the False
+# constants on the diagonal of the pour selectors
+
+def actionVars(actionSelectorsAt):
+    actions = []
+    for (fillsAtI, emptiesAtI, poursAtI) in actionSelectorsAt:
+        actions += fillsAtI + emptiesAtI
+        for poursFromB in poursAtI:
+            actions += [pour for pour in poursFromB if not isinstance(pour, bool)]
+    return actions
+
+
+def solveWithBMCPortfolio(instance, maxBound, out, encoding, metrics, processes):
+    (bucketCapacities, goal) = instance
+
+    def p(txt):
+        if out: out.write(txt+'\n')
+
+    ctx = multiprocessing.get_context("spawn")
+    running = {}      # bound -> (process, connection)
+    nextBound = 1
+    satBound = None   # The shallowest bound known to be SAT, and its values
+    satValues = None
+    solution = None
+
+    def stop(bound):
+        (process, connection) = running.pop(bound)
+        process.terminate()
+        process.join()
+        connection.close()
+
+    metrics.startPhase("solve")
+    while True:
+        # Start the shallowest pending bounds
+        while (len(running) < processes and nextBound <= maxBound and
+               (satBound is None or nextBound < satBound)):
+            (receiver, sender) = ctx.Pipe(duplex = False)
+            process = ctx.Process(target = checkBound,
+                                  args = (bucketCapacities, goal, nextBound, encoding, sender))
+            process.start()
+            sender.close()
+            p("Solving the encoding for bound %d" % nextBound)
+            running[nextBound] = (process, receiver)
+            nextBound += 1
+        if not running:
+            break
+
+        ready = multiprocessing.connection.wait([c for (_, c) in running.values()])
+        for connection in ready:
+            try:
+                (bound, result, values) = connection.recv()
+            except EOFError:
+                bound = [b for b in running if running[b][1] is connection][0]
+                (result, values) = ("unknown", "the worker process died")
+            stop(bound)
+            p("Done, the result for bound %d is: %s" % (bound, result))
+            if result == "sat" and (satBound is None or bound < satBound):
+                (satBound, satValues) = (bound, values)
+                for deeper in [b for b in running if b > bound]:
+                    stop(deeper)
+            elif result == "unknown":
+                p('"unknown" (with reason "'+values+'") returned by the solver, aborting')
+                solution = "error"
+        if solution == "error":
+            for bound in list(running):
+                stop(bound)
+            break
+    metrics.setInfo("portfolioBounds", nextBound-1)
+
+    if solution is None and satBound is None:
+        solution = "not found"
+    elif solution is None:
+        # Replay the trace of the worker in the encoding of its bound
+        metrics.startPhase("decode")
+        (s, bucketsAt, actionSelectorsAt) = boundEncoding(bucketCapacities, goal, satBound,
+                                                          encoding, metrics)
+        byName = dict([(str(var), var) for var in actionVars(actionSelectorsAt)] +
+                      [(str(var), var) for bucketsAtI in bucketsAt for var in bucketsAtI])
+        for (name, value) in satValues:
+            var = byName[name]
+            s.add(var == value)
+        if s.check() != sat:
+            raise TraceValidationError("The trace of bound %d is not a model of the encoding" % satBound)
+        p("The bucket capacities are: "+str(bucketCapacities))
+        p("The goal is: "+str(goal))
+        p("The solution is:")
+        printSolution(bucketCapacities, goal, (bucketsAt, actionSelectorsAt),
+                      satBound, s.model(), out)
+        solution = "found"
+
+    metrics.endPhase()
+    return solution
+
+
+#
+# Bounded model checking with an encoding of its own for each bound,
+# with one encoding reused over a bound schedule, or with a portfolio of
+# the bounds in the given number of processes, see above.  With engine
+# "auto" the explicit-state search is used instead when the state space
+# is small enough and neither a schedule nor processes are given.
+#
+
+def solveWithBMC(instance, maxBound, out = sys.stdout, encoding = "pairwise",
+                 metrics = None, schedule = None, processes = None, engine = "auto"):
+    assert(isinstance(maxBound, int) and maxBound >= 1)
+    assert(schedule is None or schedule in BOUND_SCHEDULES)
+    assert(processes is None or (schedule is None and processes >= 1))
+    if engine == "auto" and (schedule is not None or processes is not None):
+        engine = "sat"
+    if useBFS(instance[0], engine):
+        return solveWithBFS(instance, maxBound, out, metrics)
+    metrics = ensureMetrics(metrics)
+    (bucketCapacities, goal) = instance
+    assert(len(bucketCapacities) >= 1)
+    assert(isinstance(goal, int))
+    nofBuckets = len(bucketCapacities)
+
+    def p(txt):
+        if out: out.write(txt+'\n')
+
+    if schedule is not None:
+        return solveWithScheduledBMC(instance, maxBound, out, encoding, metrics,
+                                     schedule)
+    if processes is not None:
+        return solveWithBMCPortfolio(instance, maxBound, out, encoding, metrics,
+                                     processes)
+
+    solution = None
+
+    for bound in range(1, maxBound+1):
+        metrics.startPhase("encode")
+        p("Getting the encoding for bound "+str(bound))
+        (s, bucketsAt, actionSelectorsAt) = boundEncoding(bucketCapacities, goal, bound,
+                                                          encoding, metrics)
 
         # Check if we have a solution already
         p("Solving the encoding for bound %d" % bound)
+        metrics.startPhase("solve")
         result = s.check()
+        metrics.solverStatistics(s)
+        metrics.startPhase("decode")
         p("Done, the result is: "+str(result))
         if result == unsat:
             # No solution yet
@@ -294,12 +757,17 @@ def solveWithBMC(instance, maxBound, out = sys.stdout):
             solution = "error"
             break;
 
+    metrics.endPhase()
     return solution
         
 
 
-def solveWithIncrementalBMC(instance, maxBound, out = sys.stdout):
+def solveWithIncrementalBMC(instance, maxBound, out = sys.stdout, encoding = "pairwise",
+                            metrics = None, engine = "auto"):
     assert(isinstance(maxBound, int) and maxBound >= 1)
+    if useBFS(instance[0], engine):
+        return solveWithBFS(instance, maxBound, out, metrics)
+    metrics = ensureMetrics(metrics)
     (bucketCapacities, goal) = instance
     assert(len(bucketCapacities) >= 1)
     assert(isinstance(goal, int))
@@ -310,6 +778,8 @@ def solveWithIncrementalBMC(instance, maxBound, out = sys.stdout):
 
     solution = None
 
+    metrics.startPhase("encode")
+
     # Bucket variables for the initial state (time 1)
     bucketsAtI = createBucketVars(1, nofBuckets)
 
@@ -324,18 +794,22 @@ def solveWithIncrementalBMC(instance, maxBound, out = sys.stdout):
 
     # Force the initial state to be legal
     p("Getting the encoding for bound 1")
-    s.add(initialStateFormula(bucketsAtI))
+    s.add(metrics.formula("initialStateFormula", initialStateFormula(bucketsAtI)))
 
     bound = 1
     while True:
         # Create a backtracking point for solver state
         s.push()
         # Temporarily force the last state to be a goal state
-        s.add(goalStateFormula(bucketsAtI, goal))
+        s.add(metrics.formula("goalStateFormula",
+                               goalStateFormula(bucketsAtI, goal, encoding)))
 
         # Check if we have a solution already
         p("Solving the encoding for bound %d" % bound)
+        metrics.startPhase("solve")
         result = s.check()
+        metrics.solverStatistics(s)
+        metrics.startPhase("decode")
         p("Done, the result is: "+str(result))
         if result == unsat:
             # No solution yet
@@ -346,6 +820,7 @@ def solveWithIncrementalBMC(instance, maxBound, out = sys.stdout):
             # Retract the goal state formula
             s.pop()
 
+            metrics.startPhase("encode")
             p("Getting the encoding for bound %d" % (bound+1))
 
             # Create action selector variables
@@ -356,11 +831,13 @@ def solveWithIncrementalBMC(instance, maxBound, out = sys.stdout):
             bucketsAt.append(bucketsAtNextI)
 
             # Must take exactly one action
-            s.add(exactlyOneActionFormula(actionSelectorsAtI))
+            s.add(metrics.formula("exactlyOneActionFormula",
+                                   exactlyOneActionFormula(actionSelectorsAtI, encoding)))
 
             # Encode the actions
-            s.add(stepFormula(bucketCapacities,
-                              bucketsAtI, actionSelectorsAtI, bucketsAtNextI))
+            s.add(metrics.formula("stepFormula",
+                                  stepFormula(bucketCapacities, bucketsAtI,
+                                              actionSelectorsAtI, bucketsAtNextI)))
 
             bucketsAtI = bucketsAtNextI
             bound += 1
@@ -381,5 +858,6 @@ def solveWithIncrementalBMC(instance, maxBound, out = sys.stdout):
             solution = "error"
             break;
 
+    metrics.endPhase()
     return solution
         
@@ -0,0 +1,133 @@
+from z3 import *
+
+#
+# Cardinality constraints shared by the solver modules.
+#
+# All the functions take a list of Z3 Boolean formulas and return a
+# single formula.  The "encoding" argument selects how "at most one"
+# is spelled out:
+#
+# - "pairwise":   one binary clause per unordered pair, O(n^2) clauses and
+#                 no auxiliary variables
+# - "sequential": the sequential counter of Sinz, O(n) clauses and n-1
+#                 auxiliary variables
+# - "commander":  the commander encoding of Klieber and Kwon with groups
+#                 of three, O(n) clauses and about n/2 auxiliary variables
+# - "bimander":   the bimander encoding of Nguyen and Mai, pairwise inside
+#                 groups plus a binary encoding of the group index
+# - "native":     Z3's own AtMost/AtLeast/PbEq constraints, handled by the
+#                 solver's cardinality engine without any clausification
+#
+# The auxiliary variables are created with FreshBool, so they never clash
+# with the named variables of the encodings and are ignored when a
+# model is decoded.
+#
+
+ENCODINGS = ("pairwise", "sequential", "commander", "bimander", "native")
+
+# Group size used by the commander and the bimander encodings
+
+COMMANDER_GROUP_SIZE = 3
+BIMANDER_GROUP_SIZE = 2
+
+
+def checkEncoding(encoding):
+    if encoding not in ENCODINGS:
+        raise ValueError("Unknown cardinality encoding %r, expected one of %s"
+                         % (encoding, ", ".join(ENCODINGS)))
+
+
+#
+# Return a formula that evaluates to true if and only if
+# at least one of the argument formulas evaluates to true.
+#
+def atLeastOneFormula(formulas):
+    if len(formulas) == 0: return False
+    if len(formulas) == 1: return formulas[0]
+    return Or(formulas)
+
+
+def pairwiseAtMostOne(formulas):
+    clauses = []
+    for i in range(len(formulas)):
+        for j in range(i+1, len(formulas)):
+            clauses.append(Or(Not(formulas[i]), Not(formulas[j])))
+    return clauses
+
+
+def sequentialAtMostOne(formulas):
+    n = len(formulas)
+    s = [FreshBool("seq") for i in range(n-1)]
+    clauses = [Or(Not(formulas[0]), s[0])]
+    for i in range(1, n-1):
+        clauses.append(Or(Not(formulas[i]), s[i]))
+        clauses.append(Or(Not(s[i-1]), s[i]))
+        clauses.append(Or(Not(formulas[i]), Not(s[i-1])))
+    clauses.append(Or(Not(formulas[n-1]), Not(s[n-2])))
+    return clauses
+
+
+def commanderAtMostOne(formulas):
+    clauses = []
+    while len(formulas) > COMMANDER_GROUP_SIZE + 1:
+        commanders = []
+        for g in range(0, len(formulas), COMMANDER_GROUP_SIZE):
+            group = formulas[g:g+COMMANDER_GROUP_SIZE]
+            if len(group) == 1:
+                # A singleton group is its own commander
+                commanders.append(group[0])
+                continue
+            c = FreshBool("cmd")
+            commanders.append(c)
+            clauses += pairwiseAtMostOne(group)
+            clauses += [Or(Not(f), c) for f in group]
+        formulas = commanders
+    return clauses + pairwiseAtMostOne(formulas)
+
+
+def bimanderAtMostOne(formulas):
+    groups = [formulas[g:g+BIMANDER_GROUP_SIZE]
+              for g in range(0, len(formulas), BIMANDER_GROUP_SIZE)]
+    nofBits = (len(groups)-1).bit_length()
+    bits = [FreshBool("bim") for j in range(nofBits)]
+    clauses = []
+    for i in range(len(groups)):
+        clauses += pairwiseAtMostOne(groups[i])
+        for f in groups[i]:
+            for j in range(nofBits):
+                bit = bits[j] if (i >> j) & 1 else Not(bits[j])
+                clauses.append(Or(Not(f), bit))
+    return clauses
+
+
+#
+# Return a formula that evaluates to true if and only if
+# at most one of the argument formulas evaluates to true.
+#
+def atMostOneFormula(formulas, encoding = "pairwise"):
+    checkEncoding(encoding)
+    if len(formulas) <= 1: return True
+    if encoding == "native":
+        return AtMost(*(formulas + [1]))
+    elif encoding == "sequential":
+        clauses = sequentialAtMostOne(formulas)
+    elif encoding == "commander":
+        clauses = commanderAtMostOne(formulas)
+    elif encoding == "bimander":
+        clauses = bimanderAtMostOne(formulas)
+    else:
+        clauses = pairwiseAtMostOne(formulas)
+    return And(clauses)
+
+
+#
+# Return a formula that evaluates to true if and only if
+# exactly one of the argument formulas evaluates to true.
+#
+def exactlyOneFormula(formulas, encoding = "pairwise"):
+    checkEncoding(encoding)
+    if len(formulas) == 0: return False
+    if len(formulas) == 1: return formulas[0]
+    if encoding == "native":
+        return PbEq([(f, 1) for f in formulas], 1)
+    return And(atLeastOneFormula(formulas), atMostOneFormula(formulas, encoding))
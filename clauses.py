@@ -0,0 +1,94 @@
+from z3 import *
+
+#
+# Fast construction of clauses for the large encodings.
+#
+# Or, And and Not of the Z3 API check and coerce every argument in
+# Python, which costs about ten times as much as creating the term.  For
+# encodings of hundreds of thousands of clauses that is most of the
+# encoding time, so the functions below create the same terms directly
+# through the C API.  Their arguments must be Boolean Z3 expressions of
+# one context, e.g. the variables of an encoding; Python booleans are
+# not accepted.
+#
+
+def clause(literals):
+    n = len(literals)
+    if n == 0: return BoolVal(False)
+    if n == 1: return literals[0]
+    ctx = literals[0].ctx
+    args = (Ast * n)()
+    for (i, literal) in enumerate(literals):
+        args[i] = literal.as_ast()
+    return BoolRef(Z3_mk_or(ctx.ref(), n, args), ctx)
+
+
+def conjunction(formulas):
+    n = len(formulas)
+    if n == 0: return BoolVal(True)
+    if n == 1: return formulas[0]
+    ctx = formulas[0].ctx
+    args = (Ast * n)()
+    for (i, f) in enumerate(formulas):
+        args[i] = f.as_ast()
+    return BoolRef(Z3_mk_and(ctx.ref(), n, args), ctx)
+
+
+def negation(literal):
+    return BoolRef(Z3_mk_not(literal.ctx.ref(), literal.as_ast()), literal.ctx)
+
+
+# Z3's AtLeast and AtMost of the literals, a constant if there are none
+
+def atLeast(literals, k):
+    if len(literals) == 0:
+        return BoolVal(k <= 0)
+    ctx = literals[0].ctx
+    args = (Ast * len(literals))()
+    for (i, literal) in enumerate(literals):
+        args[i] = literal.as_ast()
+    return BoolRef(Z3_mk_atleast(ctx.ref(), len(literals), args, k), ctx)
+
+
+def atMost(literals, k):
+    if len(literals) == 0:
+        return BoolVal(k >= 0)
+    ctx = literals[0].ctx
+    args = (Ast * len(literals))()
+    for (i, literal) in enumerate(literals):
+        args[i] = literal.as_ast()
+    return BoolRef(Z3_mk_atmost(ctx.ref(), len(literals), args, k), ctx)
+
+
+# The values of Boolean variables in a model: True, False, or None for
+# the variables the model leaves undefined.  Reading the model through
+# model[var] and is_true costs about as much per variable as creating a
+# clause does.
+
+def modelValues(model, variables):
+    ctx = model.ctx.ref()
+    values = []
+    for var in variables:
+        decl = Z3_get_app_decl(ctx, var.as_ast())
+        value = Z3_model_get_const_interp(ctx, model.model, decl)
+        if not value:
+            values.append(None)
+        else:
+            values.append(Z3_get_bool_value(ctx, value) == Z3_L_TRUE)
+    return values
+
+
+# The same for integer and bit-vector variables: their values as Python
+# integers, or None
+
+def modelNumerals(model, variables):
+    ctx = model.ctx.ref()
+    values = []
+    for var in variables:
+        decl = Z3_get_app_decl(ctx, var.as_ast())
+        value = Z3_model_get_const_interp(ctx, model.model, decl)
+        if not value:
+            values.append(None)
+        else:
+            values.append(int(Z3_get_numeral_string(ctx, value)))
+    return values
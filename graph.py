@@ -0,0 +1,96 @@
+from array import array
+
+#
+# Compact graph representation shared by the graph modules.
+#
+# The nodes are relabeled to dense indices 0..n-1 in the order of their
+# first appearance in the edge list (the order extractNodes has always
+# used), nodes[i] is the original label of index i and index[label] the
+# other way round.  The adjacency is stored in compressed sparse row
+# form: the neighbors of index i are targets[offsets[i]:offsets[i+1]],
+# as indices.  edgeSet holds the edges as (label1,label2) pairs, for an
+# undirected graph in both orientations, so that an edge is tested in
+# constant time.  Duplicate edges are ignored.  Nodes without edges can
+# be included by giving the node list explicitly, the nodes that only
+# appear in the edges then follow the given ones.
+#
+# Everything is built in one pass over the edges plus one pass over the
+# nodes, i.e. in linear time.
+#
+
+# The nodes of an edge list in the order of their first appearance
+
+def extractNodes(edges):
+    nodes = []
+    seen = set()
+    for (n1, n2) in edges:
+        if n1 not in seen:
+            seen.add(n1)
+            nodes.append(n1)
+        if n2 not in seen:
+            seen.add(n2)
+            nodes.append(n2)
+    return nodes
+
+
+class Graph:
+    def __init__(self, edges, directed = False, nodes = None):
+        self.directed = directed
+        self.nodes = extractNodes(edges)
+        if nodes is not None:
+            given = set(nodes)
+            self.nodes = list(nodes) + [n for n in self.nodes if n not in given]
+        self.index = dict([(n, i) for (i, n) in enumerate(self.nodes)])
+        nofNodes = len(self.nodes)
+
+        self.edgeSet = set()
+        sources = array("l")
+        targets = array("l")
+        for (n1, n2) in edges:
+            if (n1, n2) in self.edgeSet:
+                continue
+            self.edgeSet.add((n1, n2))
+            sources.append(self.index[n1])
+            targets.append(self.index[n2])
+            if not directed:
+                self.edgeSet.add((n2, n1))
+                sources.append(self.index[n2])
+                targets.append(self.index[n1])
+        self.nofEdges = len(sources) if directed else len(sources)//2
+
+        self.degrees = array("l", [0]) * nofNodes
+        for i in sources:
+            self.degrees[i] += 1
+        self.offsets = array("l", [0]) * (nofNodes+1)
+        for i in range(nofNodes):
+            self.offsets[i+1] = self.offsets[i] + self.degrees[i]
+        self.targets = array("l", [0]) * len(targets)
+        fill = array("l", self.offsets[:nofNodes])
+        for (i, j) in zip(sources, targets):
+            self.targets[fill[i]] = j
+            fill[i] += 1
+
+    def nofNodes(self):
+        return len(self.nodes)
+
+    def hasEdge(self, n1, n2):
+        return (n1, n2) in self.edgeSet
+
+    def degree(self, node):
+        return self.degrees[self.index[node]]
+
+    # Neighbors (successors for a directed graph) of a node by index
+
+    def neighborIndices(self, i):
+        return self.targets[self.offsets[i]:self.offsets[i+1]]
+
+    # Neighbors (successors for a directed graph) of a node by label
+
+    def neighbors(self, node):
+        nodes = self.nodes
+        return [nodes[j] for j in self.neighborIndices(self.index[node])]
+
+    # The neighbors of every node as a dictionary of sets of labels
+
+    def neighborSets(self):
+        return dict([(n, set(self.neighbors(n))) for n in self.nodes])
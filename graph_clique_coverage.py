@@ -1,6 +1,12 @@
 from z3 import *
 import sys
-# STUDENTS: do not add or modify import statements!
+import time
+import numpy as np
+from metrics import ensureMetrics
+from variables import VarTable
+from graph import Graph
+from validation import readMatrix, cliqueCoverProblem
+from clauses import clause, conjunction, negation
 
 # The parts that you should fill are marked with "INSERT YOUR CODE HERE".
 
@@ -18,49 +24,141 @@ def member(node, clique):
 
 # Each clique must contain at least one node
 
-def assignNodesFormula(nodes, clique):
-    return Or([member(n, clique) for n in nodes]) # INSERT YOUR CODE HERE
-
-# In a clique, every pair of nodes must be connected by an edge
-
-def testCompletenessFormula(clique, nodes, edges):
-    tempbool = True
-    for i in range(len(nodes)):
-        for j in range(i+1, len(nodes)):
-            if (nodes[i],nodes[j]) not in edges:
-                tempbool = And(tempbool,Or(Not(member(nodes[i], clique)), Not(member(nodes[j], clique))))
-    return tempbool # INSERT YOUR CODE HERE
+def assignNodesFormula(nodes, clique, member = member):
+    return clause([member(n, clique) for n in nodes]) # INSERT YOUR CODE HERE
+
+# The formulas below that look at the edges take them either as a list
+# of edges, as a Graph or as a CliqueIndex; findCliques builds one
+# CliqueIndex and passes it to all of them so that nothing is recomputed
+# per clique.
+#
+# The index holds, for every node, its neighbors and its two-hop
+# non-neighbors: the nodes at distance exactly two.  These are the only
+# non-neighbors the encoding has to look at.  If a and b are both in a
+# complete clique S and a node i outside S is adjacent to a but not to b,
+# then b is a two-hop non-neighbor of i.  All the nodes of a clique lie
+# in the closed neighborhood of its first member (its leader), and so
+# two of them that are not adjacent are two-hop non-neighbors too.  The
+# two-hop lists are far shorter than the n^2 node pairs on sparse graphs.
+#
+# The formulas are conjunctions of flat clauses built with clauses.py.
+
+class CliqueIndex:
+    def __init__(self, graph):
+        self.graph = graph
+        self.nodes = graph.nodes
+        neighbors = graph.neighborSets()
+        self.neighbors = dict([(n, sorted(neighbors[n])) for n in self.nodes])
+        self.twoHop = {}
+        for n in self.nodes:
+            reach = set()
+            for m in neighbors[n]:
+                reach |= neighbors[m]
+            reach -= neighbors[n]
+            reach.discard(n)
+            self.twoHop[n] = sorted(reach)
+
+def asIndex(edges):
+    if isinstance(edges, CliqueIndex):
+        return edges
+    if isinstance(edges, Graph):
+        return CliqueIndex(edges)
+    return CliqueIndex(Graph(edges))
+
+# Auxiliary variables of a clique c (and a node n):
+# - first_c_n: n is the first member of c in the order of the nodes
+# - before_c_n: some node before n is a member of c
+# - hasnei_c_n: some neighbor of n is a member of c
+
+def first(clique, node):
+    return Bool("first_%d_%d" % (clique, node))
+
+def before(clique, node):
+    return Bool("before_%d_%d" % (clique, node))
+
+def hasnei(clique, node):
+    return Bool("hasnei_%d_%d" % (clique, node))
+
+# In a clique, every pair of nodes must be connected by an edge.
+#
+# The nodes of the clique are in the closed neighborhood of its first
+# member, which is unique: a first member has no member before it, and
+# every member makes all later nodes have one.  Two members that are not
+# adjacent are then two-hop non-neighbors, and only those pairs are
+# excluded.  The clauses are linear in the edges plus the two-hop pairs.
+
+def testCompletenessFormula(clique, nodes, edges, member = member):
+    index = asIndex(edges)
+    firsts = dict([(n, first(clique, n)) for n in nodes])
+    befores = [before(clique, n) for n in nodes]
+    notMember = dict([(n, negation(member(n, clique))) for n in nodes])
+    clauses = []
+    for (k, n) in enumerate(nodes):
+        clauses.append(clause([negation(firsts[n]), member(n, clique)]))
+        if k > 0:
+            clauses.append(clause([negation(firsts[n]), negation(befores[k])]))
+            clauses.append(clause([notMember[nodes[k-1]], befores[k]]))
+            if k > 1:
+                clauses.append(clause([negation(befores[k-1]), befores[k]]))
+        clauses.append(clause([notMember[n], firsts[n]] +
+                              [firsts[m] for m in index.neighbors[n]]))
+        for m in index.twoHop[n]:
+            if m > n:
+                clauses.append(clause([notMember[n], notMember[m]]))
+    return conjunction(clauses)
 
 # Cliques must NOT be contained in each other
 
 #cliqe1 not in clique 2
-def testInclusionFormula(clique1, clique2, nodes):
-    tempbool = True
-    for node in nodes:
-        tempbool = And(tempbool, Or(Not(member(node, clique1)), member(node, clique2)))
-    return Not(tempbool) # INSERT YOUR CODE HERE
+def testInclusionFormula(clique1, clique2, nodes, member = member):
+    return clause([conjunction([member(node, clique1), negation(member(node, clique2))])
+                   for node in nodes])
 
 # A clique is a maximal set of nodes such that every pair of nodes
 # in it is connected by and edge.
-
-def testMaximalityFormula(clique, nodes, edges):
-    tempbool = False
-    for i in nodes: 
-        nei = []
-        for j in edges:
-            if i in j:
-                nei.extend([j[0],j[1]])
-        nei = list(set(nei)) #contain i 
-        notnei = list(set(nodes) - set(nei)) #all not neighbors
-        nei.remove(i)#neighbors not contain i
-        
-        tempbool = Or(tempbool, And(Not(member(i, clique)), Or([member(node, clique) for node in nei]), And([Not(member(node, clique)) for node in notnei])))
-    return Not(tempbool) # INSERT YOUR CODE HERE
+#
+# A node outside a (complete) clique with no neighbor in it cannot be
+# added to it.  A node with a neighbor in it can be added unless one of
+# its two-hop non-neighbors is in the clique as well.  hasnei_c_n is
+# forced by the members among the neighbors of n, so the clauses are
+# linear in the edges plus the two-hop pairs.
+
+def testMaximalityFormula(clique, nodes, edges, member = member):
+    index = asIndex(edges)
+    notMember = dict([(n, negation(member(n, clique))) for n in nodes])
+    clauses = []
+    for n in nodes:
+        neighborIn = hasnei(clique, n)
+        for m in index.neighbors[n]:
+            clauses.append(clause([notMember[m], neighborIn]))
+        clauses.append(clause([member(n, clique), negation(neighborIn)] +
+                              [member(m, clique) for m in index.twoHop[n]]))
+    return conjunction(clauses)
 
 # Each edge must be contained in at least one clique
-def coverEdgeFormula(edge, nofCliques):
+def coverEdgeFormula(edge, nofCliques, member = member):
     (n1,n2) = edge
-    return Or([And(member(n1,clique),member(n2,clique)) for clique in range(0, nofCliques)])
+    return clause([conjunction([member(n1,clique),member(n2,clique)]) for clique in range(0, nofCliques)])
+
+# Symmetry breaking: the cliques are interchangeable, so their membership
+# vectors (in the order of the nodes) can be required to be in strictly
+# increasing lexicographic order, with false < true.  The cliques of a
+# cover are distinct anyway, so no solutions are lost (up to renaming the
+# cliques).  The auxiliary variable lexeq_c1_c2_i holds only if the
+# vectors of the cliques c1 and c2 agree on the first i nodes.
+
+def lexOrderFormula(clique1, clique2, nodes, member = member):
+    eq = [Bool("lexeq_%d_%d_%d" % (clique1, clique2, i)) for i in range(len(nodes))]
+    clauses = [eq[0]]
+    for i in range(1, len(nodes)):
+        (m1, m2) = (member(nodes[i-1], clique1), member(nodes[i-1], clique2))
+        clauses.append(clause([negation(eq[i]), eq[i-1]]))
+        clauses.append(clause([negation(eq[i]), negation(m1), m2]))
+        clauses.append(clause([negation(eq[i]), m1, negation(m2)]))
+    clauses.append(clause([conjunction([eq[i], negation(member(nodes[i], clique1)),
+                                        member(nodes[i], clique2)])
+                           for i in range(len(nodes))]))
+    return conjunction(clauses)
 
 class ValidationError(Exception):
     def __init__(self, value):
@@ -68,62 +166,186 @@ class ValidationError(Exception):
     def __str__(self):
         return repr(self.value)
 
-def checkSolution(nodes, edges, noc, model, out = sys.stdout):
+def checkSolution(nodes, edges, noc, model, out = sys.stdout, member = member):
     """
     Print (and validate) the solution found 
     """
     assert(isinstance(noc, int) and noc >= 1)
 
-    # Helper functions
-    def p(txt):
-        if(out): out.write(txt+"\n")
-
-    def decodeClique(clique):
-        members = []
-        for n in nodes:
-            var = member(n, clique)
-            val = model[var]
-            if val == None:
-                raise ValidationError("The model does not define the value of member_%d_%d properly!" % (n, clique))
-            elif is_true(val):
-                members.append(n)
-        return members
-
-    allcliques = []
-
-    for c in range(0, noc):
-        cnodes = decodeClique(c)
-        if cnodes == None:
-            raise ValidationError( \
-                "The model does not determine the clique %d!" % (c))
-        else:
-            allcliques.append(cnodes)
+    # The model is read once into a node x clique matrix, see validation.py
+    graph = Graph(edges, nodes = nodes)
+    (values, defined) = readMatrix(model, graph, noc, member)
 
-    # Check that each clique is non-empty
-    for c in range(0, noc):
-        if allcliques[c] == []:
-            raise ValidationError("Clique %d is empty!" % (c))
+    # Check that each clique is non-empty, complete and maximal, that the
+    # cliques are distinct and that they cover all the edges
+    problem = cliqueCoverProblem(graph, values, defined)
+    if problem is not None:
+        raise ValidationError(problem)
 
-    # Other checks are perfomed later
+    allcliques = [[nodes[i] for i in np.nonzero(values[:, c])[0]]
+                  for c in range(0, noc)]
 
     return allcliques
         
 def extractNodes(edges):
-    nodes = []
     for e in edges:
       (n1,n2) = e
       assert(isinstance(n1, int) and isinstance(n2, int) and n1 < n2)
-      if n1 not in nodes: nodes.append(n1)
-      if n2 not in nodes: nodes.append(n2)
-    return nodes
+    return Graph(edges).nodes
+
+# The maximal cliques of the graph by the Bron-Kerbosch algorithm with
+# pivoting (Tomita et al.), started from the nodes in a degeneracy order
+# as proposed by Eppstein, Loffler and Strash: each node n is expanded
+# with the later neighbors of n as candidates and the earlier ones as
+# excluded, so the candidate sets stay below the degeneracy of the graph.
+# The cliques are lists of nodes in the order of graph.nodes.
+
+def degeneracyOrder(graph):
+    nofNodes = graph.nofNodes()
+    degree = list(graph.degrees)
+    buckets = [set() for d in range(max(degree)+1)]
+    for i in range(nofNodes):
+        buckets[degree[i]].add(i)
+    order = []
+    removed = [False] * nofNodes
+    d = 0
+    for k in range(nofNodes):
+        d = max(d-1, 0)
+        while len(buckets[d]) == 0:
+            d += 1
+        i = buckets[d].pop()
+        order.append(i)
+        removed[i] = True
+        for j in graph.neighborIndices(i):
+            if not removed[j]:
+                buckets[degree[j]].discard(j)
+                degree[j] -= 1
+                buckets[degree[j]].add(j)
+    return order
+
+def maximalCliques(graph):
+    neighbors = [set(graph.neighborIndices(i)) for i in range(graph.nofNodes())]
+    cliques = []
+
+    def expand(clique, candidates, excluded):
+        if len(candidates) == 0 and len(excluded) == 0:
+            cliques.append(sorted(clique))
+            return
+        pivot = max(candidates | excluded, key = lambda u: len(candidates & neighbors[u]))
+        for v in list(candidates - neighbors[pivot]):
+            expand(clique + [v], candidates & neighbors[v], excluded & neighbors[v])
+            candidates.remove(v)
+            excluded.add(v)
+
+    position = {}
+    for (k, i) in enumerate(degeneracyOrder(graph)):
+        position[i] = k
+    for i in sorted(position, key = lambda i: position[i]):
+        later = set([j for j in neighbors[i] if position[j] > position[i]])
+        earlier = neighbors[i] - later
+        expand([i], later, earlier)
+    return [[graph.nodes[i] for i in clique] for clique in cliques]
+
+# The set cover backend: the Boolean variable pick_i is true iff the
+# maximal clique i is one of the cliques of the cover.  Every edge must
+# be in a picked clique and exactly nofCliques cliques are picked, with
+# Z3's native pseudo-Boolean constraint.  Maximal cliques are distinct
+# and never contained in each other, so any such choice is a solution of
+# the membership encoding, and the other way round.
+
+def pick(clique):
+    return Bool("pick_%d" % (clique))
+
+def coverEdgeByPicksFormula(cliques, pick = pick):
+    return clause([pick(i) for i in cliques])
+
+def nofPicksFormula(nofMaximal, nofCliques, pick = pick):
+    return PbEq([(pick(i), 1) for i in range(nofMaximal)], nofCliques)
+
+def coverWithMaximalCliques(graph, nofCliques, p, metrics):
+    metrics.startPhase("preprocess")
+    maximal = maximalCliques(graph)
+    p("Found %d maximal cliques" % len(maximal))
+    metrics.setInfo("maximalCliques", len(maximal))
+    if len(maximal) < nofCliques:
+        p("No coverage possible!")
+        metrics.endPhase()
+        return ("nonexistent", [])
+
+    metrics.startPhase("encode")
+    s = Solver()
+    pickVars = VarTable(pick, range(len(maximal)))
+    containing = dict([(e, []) for e in graph.edgeSet])
+    for (i, clique) in enumerate(maximal):
+        for (k, n1) in enumerate(clique):
+            for n2 in clique[k+1:]:
+                containing[(n1, n2)].append(i)
+    for (n1, n2) in graph.edgeSet:
+        if graph.index[n1] < graph.index[n2]:
+            s.add(metrics.formula("coverEdgeByPicksFormula",
+                                   coverEdgeByPicksFormula(containing[(n1, n2)], pickVars)))
+    s.add(metrics.formula("nofPicksFormula",
+                           nofPicksFormula(len(maximal), nofCliques, pickVars)))
+
+    metrics.startPhase("solve")
+    result = s.check()
+    metrics.solverStatistics(s)
+    metrics.startPhase("decode")
+    p("The solver says: "+str(result))
+
+    if result == unsat:
+        p("No coverage possible!")
+        solution = ("nonexistent", [])
+
+    elif result == sat:
+        model = s.model()
+        picked = [maximal[i] for i in range(len(maximal))
+                  if is_true(model.eval(pickVars(i), model_completion = True))]
+        values = np.zeros((graph.nofNodes(), nofCliques), dtype = bool)
+        for (c, clique) in enumerate(picked):
+            values[[graph.index[n] for n in clique], c] = True
+        problem = cliqueCoverProblem(graph, values, np.ones(values.shape, dtype = bool))
+        if problem is not None:
+            raise ValidationError(problem)
+        p("Cliques of the graph: %s" % picked)
+        solution = ("found", picked)
+
+    else:
+        assert(result == unknown)
+        p('"unknown" (with reason "'+ \
+          s.reason_unknown()+ \
+          '") returned by the solver, aborting!')
+        solution = ("error", [])
+
+    metrics.endPhase()
+    return solution
+
+#
+# Cover the edges of the graph with nofCliques distinct maximal cliques.
+#
+# backend is one of BACKENDS: "membership" encodes the membership of
+# every node in every clique (the formulas above), "setcover" enumerates
+# the maximal cliques first and picks nofCliques of them.  The number of
+# maximal cliques is small on sparse graphs, where "setcover" is much
+# faster, but it can grow exponentially on dense ones.
+#
 
-def findCliques(edges, nofCliques, out = sys.stdout):
+BACKENDS = ("membership", "setcover")
+
+def findCliques(edges, nofCliques, out = sys.stdout, metrics = None,
+                symmetryBreaking = False, backend = "membership"):
     assert(isinstance(nofCliques, int) and nofCliques >= 1)
+    assert(backend in BACKENDS)
+    metrics = ensureMetrics(metrics)
+    metrics.startPhase("encode")
 
     nofEdges = len(edges)
     assert(nofEdges >= 1)
 
-    nodes = extractNodes(edges)
+    for (n1,n2) in edges:
+        assert(isinstance(n1, int) and isinstance(n2, int) and n1 < n2)
+    graph = Graph(edges)
+    nodes = graph.nodes
     nofNodes = len(nodes)
 
     # Helper functions
@@ -138,28 +360,52 @@ def findCliques(edges, nofCliques, out = sys.stdout):
     p("%d edges: %s" % (nofEdges,edges))
     p("#cliques: %d" % nofCliques)
 
+    if backend == "setcover":
+        return coverWithMaximalCliques(graph, nofCliques, p, metrics)
+
+    index = CliqueIndex(graph)
+
     # Create one solver instance that we'll use all the time
     s = Solver()
+    memberVars = VarTable(member, nodes, range(nofCliques))
 
     for c in range(0, nofCliques):
-        s.add(assignNodesFormula(nodes, c))
+        s.add(metrics.formula("assignNodesFormula",
+                               assignNodesFormula(nodes, c, memberVars)))
 
     for c in range(0, nofCliques):
-        s.add(testCompletenessFormula(c, nodes, edges))
-
-    for c1 in range(0, nofCliques):
-        for c2 in range(c1+1, nofCliques):
-            s.add(testInclusionFormula(c1,c2,nodes))
-            s.add(testInclusionFormula(c2,c1,nodes))
+        s.add(metrics.formula("testCompletenessFormula",
+                               testCompletenessFormula(c, nodes, index, memberVars)))
+
+    # With symmetry breaking the cliques are in strictly increasing order,
+    # hence distinct, and two distinct maximal cliques are never contained
+    # in each other, so the inclusion formulas would be redundant
+    if not symmetryBreaking:
+        for c1 in range(0, nofCliques):
+            for c2 in range(c1+1, nofCliques):
+                s.add(metrics.formula("testInclusionFormula",
+                                       testInclusionFormula(c1,c2,nodes,memberVars)))
+                s.add(metrics.formula("testInclusionFormula",
+                                       testInclusionFormula(c2,c1,nodes,memberVars)))
 
     for c in range(0, nofCliques):
-        s.add(testMaximalityFormula(c, nodes, edges))
+        s.add(metrics.formula("testMaximalityFormula",
+                               testMaximalityFormula(c, nodes, index, memberVars)))
 
     for e in edges:
-        s.add(coverEdgeFormula(e, nofCliques))
+        s.add(metrics.formula("coverEdgeFormula",
+                               coverEdgeFormula(e, nofCliques, memberVars)))
+
+    if symmetryBreaking:
+        for c in range(0, nofCliques-1):
+            s.add(metrics.formula("lexOrderFormula",
+                                   lexOrderFormula(c, c+1, nodes, memberVars)))
  
     cliques = []
+    metrics.startPhase("solve")
     result = s.check()
+    metrics.solverStatistics(s)
+    metrics.startPhase("decode")
     p("The solver says: "+str(result))
 
     if result == unsat:
@@ -168,7 +414,7 @@ def findCliques(edges, nofCliques, out = sys.stdout):
 
     elif result == sat:
         model = s.model()
-        cliques = checkSolution(nodes, edges, nofCliques, model)
+        cliques = checkSolution(nodes, edges, nofCliques, model, member = memberVars)
         p("Cliques of the graph: %s" % cliques)
         solution = "found"
 
@@ -179,4 +425,148 @@ def findCliques(edges, nofCliques, out = sys.stdout):
           '") returned by the solver, aborting!')
         solution = "error"
 
+    metrics.endPhase()
     return (solution,cliques)
+
+# Greedy cover: take the first edge that is not covered yet and grow it
+# to a maximal clique, adding the candidate that covers the most
+# uncovered edges with the clique so far.  Every clique covers an edge
+# that the earlier ones do not, so the cliques are distinct.
+
+def greedyCliqueCover(graph):
+    neighbors = graph.neighborSets()
+    index = graph.index
+
+    def key(n1, n2):
+        return (n1, n2) if index[n1] < index[n2] else (n2, n1)
+
+    edges = sorted(set([key(n1, n2) for (n1, n2) in graph.edgeSet]),
+                   key = lambda e: (index[e[0]], index[e[1]]))
+    uncovered = set(edges)
+    cover = []
+    for (n1, n2) in edges:
+        if (n1, n2) not in uncovered:
+            continue
+        clique = [n1, n2]
+        candidates = neighbors[n1] & neighbors[n2]
+        while len(candidates) > 0:
+            n = max(candidates,
+                    key = lambda n: (len([m for m in clique if key(m, n) in uncovered]),
+                                     -index[n]))
+            clique.append(n)
+            candidates &= neighbors[n]
+        clique.sort(key = lambda n: index[n])
+        for (k, m1) in enumerate(clique):
+            for m2 in clique[k+1:]:
+                uncovered.discard((m1, m2))
+        cover.append(clique)
+    return cover
+
+#
+# Find a cover with as few cliques as possible.
+#
+# A greedy cover gives the first upper bound.  The graph is then encoded
+# once with a slot for every clique of the greedy cover, slot c being
+# activated by the literal useclique_c: the formulas of a clique are only
+# enforced for the active slots, and the inactive slots are empty.  The
+# bound is tightened on the same solver by assuming the first k slots
+# active and the others inactive, from one less than the best cover so
+# far until the solver answers unsat.  The cliques of the active slots are
+# kept distinct by the lexicographic order of lexOrderFormula, which
+# for maximal cliques also rules out that one contains another.
+#
+# timeLimit bounds the time of the whole call in seconds, the last check
+# gets whatever is left of it.  Returns
+# ("optimal", cliques) if the cover is known to be minimum, and
+# ("found", cliques) with the best cover found so far when the time runs
+# out first.
+#
+
+def useclique(clique):
+    return Bool("useclique_%d" % (clique))
+
+def minimumCliqueCover(edges, out = sys.stdout, metrics = None, timeLimit = None):
+    metrics = ensureMetrics(metrics)
+    metrics.startPhase("encode")
+    started = time.perf_counter()
+
+    nofEdges = len(edges)
+    assert(nofEdges >= 1)
+
+    for (n1,n2) in edges:
+        assert(isinstance(n1, int) and isinstance(n2, int) and n1 < n2)
+    graph = Graph(edges)
+    index = CliqueIndex(graph)
+    nodes = graph.nodes
+    nofNodes = len(nodes)
+
+    # Helper functions
+    def p(txt):
+        if out: out.write(txt+'\n')
+
+    p("---")
+    p("%d nodes: %s" % (nofNodes,nodes))
+    p("%d edges: %s" % (nofEdges,edges))
+
+    best = greedyCliqueCover(graph)
+    nofSlots = len(best)
+    p("Greedy cover uses %d cliques" % nofSlots)
+
+    s = Solver()
+    memberVars = VarTable(member, nodes, range(nofSlots))
+    useVars = VarTable(useclique, range(nofSlots))
+
+    for c in range(nofSlots):
+        active = useVars(c)
+        s.add(metrics.formula("assignNodesFormula",
+                               Implies(active, assignNodesFormula(nodes, c, memberVars))))
+        s.add(metrics.formula("inactiveSlotFormula",
+                               conjunction([clause([active, negation(memberVars(n, c))])
+                                            for n in nodes])))
+        s.add(metrics.formula("testCompletenessFormula",
+                               testCompletenessFormula(c, nodes, index, memberVars)))
+        s.add(metrics.formula("testMaximalityFormula",
+                               testMaximalityFormula(c, nodes, index, memberVars)))
+        if c > 0:
+            s.add(metrics.formula("lexOrderFormula",
+                                   Implies(active, lexOrderFormula(c-1, c, nodes, memberVars))))
+
+    for e in edges:
+        s.add(metrics.formula("coverEdgeFormula",
+                               coverEdgeFormula(e, nofSlots, memberVars)))
+
+    optimal = False
+    while len(best) > 1:
+        k = len(best)-1
+        if timeLimit is not None:
+            remaining = timeLimit - (time.perf_counter() - started)
+            if remaining <= 0:
+                break
+            s.set("timeout", max(1, int(remaining*1000)))
+        metrics.startPhase("solve")
+        result = s.check([useVars(c) for c in range(k)] +
+                         [Not(useVars(c)) for c in range(k, nofSlots)])
+        metrics.solverStatistics(s)
+        metrics.startPhase("decode")
+        p("With %d cliques the solver says: %s" % (k, result))
+
+        if result == unsat:
+            optimal = True
+            break
+        elif result == sat:
+            best = checkSolution(nodes, edges, k, s.model(), None, memberVars)
+        else:
+            assert(result == unknown)
+            p('"unknown" (with reason "'+ \
+              s.reason_unknown()+ \
+              '") returned by the solver, stopping!')
+            break
+        metrics.startPhase("encode")
+    else:
+        optimal = True
+
+    p("%s cover with %d cliques: %s"
+      % ("Minimum" if optimal else "Best", len(best), best))
+    metrics.setInfo("optimal", optimal)
+    metrics.endPhase()
+    return ("optimal" if optimal else "found", best)
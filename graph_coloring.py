@@ -1,6 +1,13 @@
 from z3 import *
 import sys
-# STUDENTS: do not add or modify import statements!
+import heapq
+import multiprocessing
+from cardinality import exactlyOneFormula
+from metrics import ensureMetrics
+from variables import VarCache, VarTable
+from graph import Graph
+from validation import readMatrix, readBitVectors, coloringProblem, \
+     binaryColoringProblem, orderColoringProblem, conflictingEdges
 
 # The parts that you should fill are marked with "INSERT YOUR CODE HERE".
 
@@ -14,93 +21,182 @@ def hascol(node, color):
     return Bool("hascol_%d_%d" % (node, color))
 
 
-def exactlyOneFormula(formulas):
-    if len(formulas) == 0: return False
-    if len(formulas) == 1: return formulas[0]
-    atLeastOne = Or(formulas)
-    atLeastTwo = Or([And(f1,f2) for f1 in formulas for f2 in formulas if f2 is not f1])
-    # Note: we have to use "is not" instead of "!=" above because
-    # f2 != f1 would be a Z3 formula "f2 != f1" and here we want to check
-    # whether f2 is not the same as f1
-    return And(atLeastOne, Not(atLeastTwo))
-
 # Every node is supposed to be colored with exactly one color
 
-def oneColorFormula(node, nofColors):
-    return exactlyOneFormula([hascol(node, color) for color in range(nofColors)])
+def oneColorFormula(node, nofColors, encoding = "pairwise", hascol = hascol):
+    return exactlyOneFormula([hascol(node, color) for color in range(nofColors)],
+                             encoding)
 
 # Make and return the coloring condition for an edge
 
-def coloringConditionFormula(edge, nofColors):
+def coloringConditionFormula(edge, nofColors, hascol = hascol):
     (n1, n2) = edge
     tempbool = True
     for c in range(nofColors):
         tempbool = And(tempbool, Not(And(hascol(n1, c), hascol(n2,c)))) 
     return tempbool
 
+# Symmetry breaking: the colors are interchangeable, so the nodes of a
+# clique can be fixed to the colors 0, 1, 2, ... without losing any
+# solutions (up to renaming the colors).  A clique larger than the
+# number of colors makes the formula unsatisfiable right away.
+
+def cliqueColorsFormula(clique, nofColors, hascol = hascol):
+    if len(clique) > nofColors:
+        return False
+    return And([hascol(n, c) for (c, n) in enumerate(clique)])
+
+# With hundreds of colors the V*k variables of hascol_n_c and the k
+# clauses per edge become too large, so colorGraph also offers two more
+# compact ways to represent the colors (its colorEncoding argument):
+#
+# - "binary": the color of node n is the bit-vector col_n of
+#   ceil(log2 k) bits, restricted to values below k, and an edge only
+#   requires col_n1 != col_n2
+# - "order": the Boolean variable colge_n_c is true iff the color of
+#   node n is at least c, for c = 1..k-1, and colge_n_c+1 implies
+#   colge_n_c; an edge gets k clauses of at most four literals
+#
+# The default "onehot" is the hascol_n_c encoding above.
+
+COLOR_ENCODINGS = ("onehot", "binary", "order")
+
+def colbits(nofColors):
+    return max(1, (nofColors-1).bit_length())
+
+def colvec(node, nofColors):
+    return BitVec("col_%d" % (node), colbits(nofColors))
+
+def colge(node, color):
+    return Bool("colge_%d_%d" % (node, color))
+
+def binaryColorFormula(node, nofColors, colvec = colvec):
+    if nofColors == 2**colbits(nofColors):
+        return True
+    return ULT(colvec(node, nofColors), nofColors)
+
+def binaryConditionFormula(edge, nofColors, colvec = colvec):
+    (n1, n2) = edge
+    return colvec(n1, nofColors) != colvec(n2, nofColors)
+
+def orderColorFormula(node, nofColors, colge = colge):
+    return And([Implies(colge(node, c+1), colge(node, c))
+                for c in range(1, nofColors-1)])
+
+# The node has exactly the given color in the order encoding
+
+def orderColorIs(node, color, nofColors, colge = colge):
+    literals = []
+    if color > 0:
+        literals.append(colge(node, color))
+    if color < nofColors-1:
+        literals.append(Not(colge(node, color+1)))
+    return And(literals)
+
+def orderConditionFormula(edge, nofColors, colge = colge):
+    (n1, n2) = edge
+    return And([Not(And(orderColorIs(n1, c, nofColors, colge),
+                        orderColorIs(n2, c, nofColors, colge)))
+                for c in range(nofColors)])
+
+# Read the colors of a model, see validation.py: the values and
+# definedness of the variables of the color encoding, and the color of
+# each node in the order of graph.nodes.  Variables the model leaves
+# undefined count as false (or 0), as in a completed model.  colorVars
+# are the variables of the solve (by default the factory of the color
+# encoding).
+
+def readColors(model, graph, noc, colorEncoding = "onehot", colorVars = None):
+    if colorEncoding == "binary":
+      colorVars = colorVars or colvec
+      (values, defined) = readBitVectors(model, graph, lambda n: colorVars(n, noc))
+      return (values, defined, values)
+    elif colorEncoding == "order":
+      (values, defined) = readMatrix(model, graph, noc, colorVars or colge)
+      return (values, defined, values[:, 1:].sum(axis = 1))
+    else:
+      (values, defined) = readMatrix(model, graph, noc, colorVars or hascol)
+      return (values, defined, values.argmax(axis = 1))
+
 class ValidationError(Exception):
     def __init__(self, value):
         self.value = value
     def __str__(self):
         return repr(self.value)
 
-def checkSolution(nodes, edges, noc, model, out = sys.stdout):
+def checkSolution(nodes, edges, noc, model, out = sys.stdout,
+                  colorEncoding = "onehot", colorVars = None):
     """
     Print (and validate) the solution found 
     """
     assert(isinstance(noc, int) and noc >= 1)
 
-    # Helper functions
-    def p(txt):
-      if(out): out.write(txt+"\n")
-
-    def decodeColor(node):
-      color = None
-      for c in range(0, noc):
-        var = hascol(node, c)
-        cval = model[var]
-        if cval == None:
-          raise ValidationError( \
-            "The model does not define the value of color_%d_%d properly!" \
-            % (node, c))
-        elif is_true(cval):
-          if color == None:
-            color = c 
-          if color != c:
-            raise ValidationError("Node %d has two colors %d and %d!" \
-                                  % (node, color, c))
-      return color
-
-    colorof = [None for n in nodes] # Initialize
+    # The model is read once into a node x color matrix (or a vector of
+    # bit-vector colors), see validation.py
+    graph = Graph(edges, nodes = nodes)
+    (values, defined, colors) = readColors(model, graph, noc, colorEncoding,
+                                           colorVars)
 
-    # Check that each node is properly colored
-    for n in nodes:
-      c = decodeColor(n)
-      if c == None:
-        raise ValidationError( \
-          "The model does not determine the color of node %d!" % (n))
-      else:
-        colorof[n-1] = c # Record
+    # Check that each node has exactly one color and that no edge
+    # connects two nodes of the same color
+    if colorEncoding == "binary":
+      (problem, colors) = binaryColoringProblem(graph, values, defined, noc)
+    elif colorEncoding == "order":
+      (problem, colors) = orderColoringProblem(graph, values, defined)
+    else:
+      (problem, colors) = coloringProblem(graph, values, defined)
+    if problem is not None:
+      raise ValidationError(problem)
 
-    # Other checks will be performed later
+    colorof = [None for n in nodes] # Initialize
+    for (i, n) in enumerate(graph.nodes):
+      colorof[n-1] = int(colors[i]) # Record
 
     return colorof
         
-def extractNodes(edges):
-    nodes = []
-    for e in edges:
-      (n1,n2) = e
-      if n1 not in nodes: nodes.append(n1)
-      if n2 not in nodes: nodes.append(n2)
-    return nodes
-
-def colorGraph(edges, nofColors, out = sys.stdout):
+#
+# Color the graph with the given number of colors.
+#
+# With preprocess, a DSatur coloring and a greedy clique are computed
+# before any formula is built.  If DSatur needs at most nofColors colors
+# its coloring is returned as the solution, and if the clique is larger
+# than nofColors the answer is "nonexistent", both without calling Z3.
+# Otherwise the DSatur colors are given to the solver as initial phases.
+# The stage that answered ("dsatur", "clique" or "solver") is printed and
+# recorded in the metrics as "answeredBy".
+#
+# colorEncoding is one of COLOR_ENCODINGS, see above.
+#
+# With lazy, the coloring conditions of the edges are generated on
+# demand: the solver starts with the color constraints of the nodes and
+# the edges of lazyInitialEdges below.  Whenever it finds a model, the
+# edges whose ends got the same color are added and the solver is asked
+# again, until the model is a proper coloring (or there is none).  The
+# solver is given the DSatur colors as initial phases, as with
+# preprocess, so its models stay close to a proper coloring.  On dense
+# graphs most edges then never bind, which saves most of the encoding.
+# The number of rounds and of edges encoded are recorded in the metrics
+# as "lazyRounds" and "lazyEdges".
+#
+# With decompose, see colorDecomposed below, only the k-core of the graph
+# is given to the solver, one connected component at a time.  processes
+# is the number of worker processes for the components, by default they
+# are colored one after the other in this process.
+#
+def colorGraph(edges, nofColors, out = sys.stdout, encoding = "pairwise",
+               metrics = None, symmetryBreaking = False, preprocess = False,
+               decompose = False, processes = None, colorEncoding = "onehot",
+               lazy = False):
     assert(isinstance(nofColors, int) and nofColors >= 1)
+    assert(colorEncoding in COLOR_ENCODINGS)
+    metrics = ensureMetrics(metrics)
+    metrics.startPhase("encode")
 
     nofEdges = len(edges)
     assert(nofEdges >= 1)
 
-    nodes = extractNodes(edges)
+    graph = Graph(edges)
+    nodes = graph.nodes
     nofNodes = len(nodes)
 
     # Helper functions
@@ -115,17 +211,127 @@ def colorGraph(edges, nofColors, out = sys.stdout):
     p("%d edges: %s" % (nofEdges,edges))
     p("#colors: %d" % nofColors)
 
+    if decompose:
+      options = {"encoding": encoding, "symmetryBreaking": symmetryBreaking,
+                 "preprocess": preprocess, "colorEncoding": colorEncoding,
+                 "lazy": lazy}
+      return colorDecomposed(graph, nofColors, out, metrics, processes, options)
+
+    if preprocess:
+      metrics.startPhase("preprocess")
+      colorof = dsaturColoring(graph)
+      if max(colorof.values()) < nofColors:
+        colors = [colorof[n] for n in sorted(nodes)]
+        p("DSatur found a coloring with %d colors" % (max(colors)+1))
+        p("Colors for nodes: %s" % colors)
+        metrics.setInfo("answeredBy", "dsatur")
+        metrics.endPhase()
+        return ("found", colors)
+      clique = greedyClique(graph)
+      if len(clique) > nofColors:
+        p("Found a clique of %d nodes: %s" % (len(clique), clique))
+        p("No coloring possible!")
+        metrics.setInfo("answeredBy", "clique")
+        metrics.endPhase()
+        return ("nonexistent", [])
+      metrics.startPhase("encode")
+
+    metrics.setInfo("answeredBy", "solver")
+
     # Create one solver instance that we'll use all the time
     s = Solver()
 
+    # colorIs(n, c) is the formula stating that node n has color c
+    if colorEncoding == "binary":
+      colorVars = VarCache(colvec)
+      colorIs = lambda n, c: colorVars(n, nofColors) == c
+    elif colorEncoding == "order":
+      colorVars = VarCache(colge)
+      colorIs = lambda n, c: orderColorIs(n, c, nofColors, colorVars)
+    else:
+      colorVars = VarTable(hascol, nodes, range(nofColors))
+      colorIs = colorVars
+
+    # The lazy mode starts from the DSatur coloring as well, so that the
+    # first models are nearly proper colorings and few edges are added
+    if lazy and not preprocess:
+      colorof = dsaturColoring(graph)
+
+    if (preprocess or lazy) and hasattr(s, "set_initial_value"):
+      for n in nodes:
+        c = colorof[n]
+        if c >= nofColors:
+          continue
+        if colorEncoding == "binary":
+          s.set_initial_value(colorVars(n, nofColors),
+                              BitVecVal(c, colbits(nofColors)))
+        elif colorEncoding == "order":
+          for d in range(1, nofColors):
+            s.set_initial_value(colorVars(n, d), BoolVal(c >= d))
+        else:
+          s.set_initial_value(colorVars(n, c), True)
+
     for n in nodes:
-      s.add(oneColorFormula(n, nofColors))
+      if colorEncoding == "binary":
+        s.add(metrics.formula("binaryColorFormula",
+                             binaryColorFormula(n, nofColors, colorVars)))
+      elif colorEncoding == "order":
+        s.add(metrics.formula("orderColorFormula",
+                             orderColorFormula(n, nofColors, colorVars)))
+      else:
+        s.add(metrics.formula("oneColorFormula",
+                             oneColorFormula(n, nofColors, encoding, colorVars)))
 
-    for e in edges:
-      s.add(coloringConditionFormula(e, nofColors))
+    def addEdge(e):
+      if colorEncoding == "binary":
+        s.add(metrics.formula("binaryConditionFormula",
+                             binaryConditionFormula(e, nofColors, colorVars)))
+      elif colorEncoding == "order":
+        s.add(metrics.formula("orderConditionFormula",
+                             orderConditionFormula(e, nofColors, colorVars)))
+      else:
+        s.add(metrics.formula("coloringConditionFormula",
+                             coloringConditionFormula(e, nofColors, colorVars)))
+
+    encoded = lazyInitialEdges(graph) if lazy else edges
+    for e in encoded:
+      addEdge(e)
+    nofEncoded = len(encoded)
+
+    if symmetryBreaking:
+      clique = greedyClique(graph)
+      p("Fixing the colors of the clique %s" % clique)
+      s.add(metrics.formula("cliqueColorsFormula",
+                           cliqueColorsFormula(clique, nofColors, colorIs)))
 
     colors = []
+    metrics.startPhase("solve")
     result = s.check()
+    metrics.solverStatistics(s)
+    rounds = 1
+
+    # Add the violated edges until the model is a proper coloring
+    while lazy and result == sat:
+      metrics.startPhase("encode")
+      (values, defined, modelColors) = readColors(s.model(), graph, nofColors,
+                                                  colorEncoding, colorVars)
+      (sources, targets) = conflictingEdges(graph, modelColors)
+      if len(sources) == 0:
+        break
+      for (i, j) in zip(sources, targets):
+        addEdge((nodes[i], nodes[j]))
+      nofEncoded += len(sources)
+      metrics.startPhase("solve")
+      result = s.check()
+      metrics.solverStatistics(s)
+      rounds += 1
+
+    if lazy:
+      p("Encoded %d of %d edges in %d rounds" % (nofEncoded, graph.nofEdges, rounds))
+      metrics.setInfo("lazyRounds", rounds)
+      metrics.setInfo("lazyEdges", nofEncoded)
+
+    metrics.startPhase("decode")
     p("The solver says: "+str(result))
 
     if result == unsat:
@@ -134,7 +340,14 @@ def colorGraph(edges, nofColors, out = sys.stdout):
 
     elif result == sat:
       model = s.model()
-      colors = checkSolution(nodes, edges, nofColors, model)
+      if lazy:
+        # Variables of nodes with few encoded edges may be left open by
+        # the model, they were read as false (0) when scanning for
+        # conflicts, so complete the model the same way
+        for var in colorVars.created():
+          model.eval(var, model_completion = True)
+      colors = checkSolution(nodes, edges, nofColors, model, None, colorEncoding,
+                             colorVars)
       p("Colors for nodes: %s" % colors)
       solution = "found"
 
@@ -144,4 +357,449 @@ def colorGraph(edges, nofColors, out = sys.stdout):
         '") returned by the solver, aborting!')
       solution = "error"
 
+    metrics.endPhase()
     return (solution,colors)
+
+# For the chromatic number search, the Boolean variable usecol_c may only
+# be false if no node has color c.  Assuming Not(usecol_c) for all colors
+# c >= k restricts the coloring to the colors 0..k-1.
+
+def usecol(color):
+    return Bool("usecol_%d" % (color))
+
+def colorUsedFormula(nodes, color, hascol = hascol):
+    return And([Implies(hascol(n, color), usecol(color)) for n in nodes])
+
+# Greedy coloring, nodes in the order of decreasing degree get the
+# smallest color not taken by their neighbors
+
+def greedyColoring(graph):
+    colorof = {}
+    for n in sorted(graph.nodes, key = lambda n: -graph.degree(n)):
+        taken = set([colorof[m] for m in graph.neighbors(n) if m in colorof])
+        c = 0
+        while c in taken:
+            c += 1
+        colorof[n] = c
+    return colorof
+
+# DSatur coloring of Brelaz: repeatedly color the uncolored node with
+# the most distinct colors among its neighbors (ties broken by degree)
+# with the smallest color none of its neighbors has.  The nodes are kept
+# in a heap with lazy deletion of outdated entries.
+
+def dsaturColoring(graph):
+    nodes = graph.nodes
+    neighbors = graph.neighborSets()
+    colorof = {}
+    neighborColors = dict([(n, set()) for n in nodes])
+    heap = [(0, -len(neighbors[n]), n) for n in nodes]
+    heapq.heapify(heap)
+    while len(heap) > 0:
+        (sat, degree, n) = heapq.heappop(heap)
+        if n in colorof or -sat != len(neighborColors[n]):
+            continue
+        c = 0
+        while c in neighborColors[n]:
+            c += 1
+        colorof[n] = c
+        for m in neighbors[n]:
+            if m not in colorof and c not in neighborColors[m]:
+                neighborColors[m].add(c)
+                heapq.heappush(heap, (-len(neighborColors[m]), -len(neighbors[m]), m))
+    return colorof
+
+# Greedy clique: starting from each of the tries nodes of highest
+# degree (all nodes by default), repeatedly add the candidate of highest
+# degree that is connected to every node picked so far.  Returns the
+# largest clique found.
+
+def greedyClique(graph, tries = None):
+    neighbors = graph.neighborSets()
+    byDegree = sorted(graph.nodes, key = lambda n: -len(neighbors[n]))
+    best = []
+    for start in byDegree[:tries]:
+        if len(neighbors[start]) < len(best):
+            break
+        clique = [start]
+        candidates = set(neighbors[start])
+        while len(candidates) > 0:
+            n = max(candidates, key = lambda n: (len(neighbors[n]), -n))
+            clique.append(n)
+            candidates &= neighbors[n]
+        if len(clique) > len(best):
+            best = clique
+    return best
+
+# The edges the lazy mode of colorGraph starts with: the edges of a
+# greedily found clique, which bind in every coloring, and one edge at
+# every node so that every node gets its color from the model.
+
+def lazyInitialEdges(graph):
+    nodes = graph.nodes
+    clique = greedyClique(graph, 8)
+    edges = set([(min(n1, n2), max(n1, n2))
+                 for (k, n1) in enumerate(clique) for n2 in clique[k+1:]])
+    for i in range(graph.nofNodes()):
+        neighbors = graph.neighborIndices(i)
+        if len(neighbors) > 0:
+            (n1, n2) = (nodes[i], nodes[neighbors[0]])
+            edges.add((min(n1, n2), max(n1, n2)))
+    return sorted(edges)
+
+# Renumber the colors of a coloring to 0..k-1 in the order of first use
+
+def compactColors(colors):
+    renumber = {}
+    for c in colors:
+        if c not in renumber:
+            renumber[c] = len(renumber)
+    return [renumber[c] for c in colors]
+
+#
+# Find the chromatic number of the graph, i.e. the least number of colors
+# with which the graph can be colored.
+#
+# The graph is encoded once for as many colors as a greedy coloring uses.
+# The number of colors is then tightened on the same solver by assuming
+# that the top colors are unused, so that the learned clauses carry over
+# between the checks.  The search is either "down" (try one color less
+# than the best coloring found so far until unsat) or "bisect" (bisection
+# between 2 and the best coloring found so far).  With symmetryBreaking
+# the colors of a greedily found clique are fixed, and the size of the
+# clique is used as the lower bound.
+#
+# Returns ("optimal", k, colors) with the chromatic number k and a
+# coloring with that many colors.  When the solver answers unknown the
+# search stops with the best coloring found so far, whose number of
+# colors is only an upper bound: the status is then "found" if the
+# solver ran out of time (e.g. under the timeout of batch.py) and
+# "error" otherwise.
+#
+def chromaticNumber(edges, out = sys.stdout, encoding = "pairwise",
+                    search = "down", metrics = None, symmetryBreaking = False):
+    assert(search in ("down", "bisect"))
+    metrics = ensureMetrics(metrics)
+    metrics.startPhase("encode")
+
+    nofEdges = len(edges)
+    assert(nofEdges >= 1)
+
+    graph = Graph(edges)
+    nodes = graph.nodes
+    nofNodes = len(nodes)
+
+    # Helper functions
+    def p(txt):
+        if out: out.write(txt+'\n')
+
+    p("---")
+    p("%d nodes: %s" % (nofNodes,nodes))
+    p("%d edges: %s" % (nofEdges,edges))
+
+    greedy = greedyColoring(graph)
+    best = compactColors([greedy[n] for n in sorted(nodes)])
+    nofColors = max(best)+1
+    p("Greedy coloring uses %d colors" % nofColors)
+
+    s = Solver()
+    colorVars = VarTable(hascol, nodes, range(nofColors))
+
+    for n in nodes:
+      s.add(metrics.formula("oneColorFormula",
+                           oneColorFormula(n, nofColors, encoding, colorVars)))
+
+    for e in edges:
+      s.add(metrics.formula("coloringConditionFormula",
+                           coloringConditionFormula(e, nofColors, colorVars)))
+
+    for c in range(nofColors):
+      s.add(metrics.formula("colorUsedFormula",
+                           colorUsedFormula(nodes, c, colorVars)))
+
+    # Any graph with an edge needs two colors, and any graph with a
+    # clique as many colors as the clique has nodes
+    lower = 2
+    upper = nofColors
+    if symmetryBreaking:
+      clique = greedyClique(graph)
+      p("Fixing the colors of the clique %s" % clique)
+      s.add(metrics.formula("cliqueColorsFormula",
+                           cliqueColorsFormula(clique, nofColors, colorVars)))
+      lower = max(lower, len(clique))
+    while lower < upper:
+      if search == "down":
+        k = upper-1
+      else:
+        k = (lower+upper)//2
+      metrics.startPhase("solve")
+      result = s.check([Not(usecol(c)) for c in range(k, nofColors)])
+      metrics.solverStatistics(s)
+      metrics.startPhase("decode")
+      p("With %d colors the solver says: %s" % (k, result))
+
+      if result == unsat:
+        lower = k+1
+      elif result == sat:
+        model = s.model()
+        colors = compactColors(checkSolution(nodes, edges, nofColors, model,
+                                             colorVars = colorVars))
+        best = colors
+        upper = max(colors)+1
+      else:
+        assert(result == unknown)
+        reason = s.reason_unknown()
+        p('"unknown" (with reason "'+reason+\
+          '") returned by the solver, aborting!')
+        solution = "found" if reason in ("timeout", "canceled") else "error"
+        break
+      metrics.startPhase("encode")
+    else:
+      solution = "optimal"
+
+    if solution == "optimal":
+      p("Chromatic number: %d" % upper)
+    else:
+      p("Chromatic number: between %d and %d" % (lower, upper))
+    p("Colors for nodes: %s" % best)
+    metrics.setInfo("optimal", solution == "optimal")
+    metrics.endPhase()
+    return (solution, upper, best)
+
+#
+# Decomposition of the coloring problem.
+#
+# A node with less than k neighbors can always be colored after its
+# neighbors have been, so such nodes are peeled off one at a time until
+# only the k-core of the graph remains.  The connected components of the
+# core are independent and are colored separately by colorGraph, after
+# relabeling their nodes to 1..m.  Finally the peeled nodes are colored
+# in reverse order with the smallest color none of their neighbors has;
+# at that point each of them has less than k colored neighbors.
+#
+
+def peelCore(graph, k):
+    nodes = graph.nodes
+    neighbors = graph.neighborSets()
+    degree = dict([(n, len(neighbors[n])) for n in nodes])
+    removed = set()
+    peeled = []
+    todo = [n for n in nodes if degree[n] < k]
+    while len(todo) > 0:
+        n = todo.pop()
+        if n in removed:
+            continue
+        removed.add(n)
+        peeled.append(n)
+        for m in neighbors[n]:
+            if m not in removed:
+                degree[m] -= 1
+                if degree[m] < k:
+                    todo.append(m)
+    core = [n for n in nodes if n not in removed]
+    return (core, peeled, neighbors)
+
+# Connected components of the subgraph induced by the given nodes,
+# each component as the list of its edges (n1,n2) with n1 < n2
+
+def componentEdges(nodes, neighbors):
+    inside = set(nodes)
+    seen = set()
+    components = []
+    for start in nodes:
+        if start in seen:
+            continue
+        seen.add(start)
+        todo = [start]
+        component = []
+        while len(todo) > 0:
+            n = todo.pop()
+            for m in neighbors[n]:
+                if m in inside:
+                    if n < m:
+                        component.append((n, m))
+                    if m not in seen:
+                        seen.add(m)
+                        todo.append(m)
+        components.append(component)
+    return components
+
+# Color one component with colorGraph, the nodes relabeled to 1..m.
+# Returns the status and the colors of the original nodes.
+
+def colorComponent(args):
+    (edges, nofColors, options, metrics) = args
+    original = sorted(set([n for e in edges for n in e]))
+    index = dict([(n, i+1) for (i, n) in enumerate(original)])
+    relabeled = [(index[n1], index[n2]) for (n1, n2) in edges]
+    (solution, colors) = colorGraph(relabeled, nofColors, None,
+                                    metrics = metrics, **options)
+    return (solution, dict([(n, colors[index[n]-1]) for n in original
+                            if solution == "found"]))
+
+def colorDecomposed(graph, nofColors, out = sys.stdout, metrics = None,
+                    processes = None, options = {}):
+    metrics = ensureMetrics(metrics)
+    metrics.startPhase("decompose")
+
+    def p(txt):
+        if out: out.write(txt+'\n')
+
+    (core, peeled, neighbors) = peelCore(graph, nofColors)
+    components = componentEdges(core, neighbors)
+    p("Peeled %d nodes of degree < %d, the core has %d nodes in %d components" \
+      % (len(peeled), nofColors, len(core), len(components)))
+
+    colorof = {}
+    solution = "found"
+    if processes is not None and processes > 1 and len(components) > 1:
+      ctx = multiprocessing.get_context("spawn")
+      with ctx.Pool(processes) as pool:
+        results = pool.map(colorComponent,
+                           [(c, nofColors, options, None) for c in components])
+    else:
+      results = []
+      for c in components:
+        results.append(colorComponent((c, nofColors, options, metrics)))
+        metrics.startPhase("decompose")
+        if results[-1][0] != "found":
+          break
+
+    for (componentSolution, componentColors) in results:
+      if componentSolution != "found":
+        solution = componentSolution
+        break
+      colorof.update(componentColors)
+
+    colors = []
+    if solution == "found":
+      for n in reversed(peeled):
+        taken = set([colorof[m] for m in neighbors[n] if m in colorof])
+        c = 0
+        while c in taken:
+          c += 1
+        colorof[n] = c
+      colors = [colorof[n] for n in sorted(graph.nodes)]
+      p("Colors for nodes: %s" % colors)
+    elif solution == "nonexistent":
+      p("No coloring possible!")
+
+    metrics.endPhase()
+    return (solution, colors)
+
+#
+# Incremental coloring of a graph that changes a little at a time.
+#
+# The coloring condition of each edge is added to the solver once,
+# guarded by the activation literal edgeon_n1_n2, and the edges present
+# in the graph are switched on by assuming their literals in each check.
+# Removing an edge only drops its assumption, adding it back reuses the
+# guarded formula.  Every node that has been seen gets its "exactly one
+# color" constraint when it first appears.
+#
+# The current coloring is kept between the checks: an edit that leaves
+# it proper (removing an edge, or adding an edge between nodes of
+# different colors) needs no check at all.  Otherwise the solver is
+# started from the previous colors as initial phases, so it only has to
+# repair the coloring around the edit.
+#
+
+def edgeon(n1, n2):
+    return Bool("edgeon_%d_%d" % (n1, n2))
+
+class IncrementalColoring:
+    def __init__(self, nofColors, edges = [], encoding = "pairwise",
+                 metrics = None):
+        assert(isinstance(nofColors, int) and nofColors >= 1)
+        self.nofColors = nofColors
+        self.encoding = encoding
+        self.metrics = ensureMetrics(metrics)
+        self.s = Solver()
+        self.colorVars = VarCache(hascol)
+        self.nodes = set()
+        self.guarded = set()
+        self.active = set()
+        self.colorof = {}
+        self.solution = None
+        self.addEdges(edges)
+
+    def addNode(self, n):
+        if n not in self.nodes:
+            self.nodes.add(n)
+            self.s.add(self.metrics.formula("oneColorFormula",
+                oneColorFormula(n, self.nofColors, self.encoding, self.colorVars)))
+
+    def addEdge(self, n1, n2):
+        e = (min(n1, n2), max(n1, n2))
+        self.addNode(n1)
+        self.addNode(n2)
+        if e not in self.guarded:
+            self.guarded.add(e)
+            self.s.add(self.metrics.formula("coloringConditionFormula",
+                Implies(edgeon(*e),
+                        coloringConditionFormula(e, self.nofColors, self.colorVars))))
+        self.active.add(e)
+        # A new node or a conflicting edge invalidates the coloring
+        if self.solution == "found" and \
+           (n1 not in self.colorof or n2 not in self.colorof or
+            self.colorof[n1] == self.colorof[n2]):
+            self.solution = None
+
+    def removeEdge(self, n1, n2):
+        self.active.discard((min(n1, n2), max(n1, n2)))
+        # Fewer edges cannot make a proper coloring improper
+        if self.solution == "nonexistent":
+            self.solution = None
+
+    def addEdges(self, edges):
+        for (n1, n2) in edges:
+            self.addEdge(n1, n2)
+
+    def removeEdges(self, edges):
+        for (n1, n2) in edges:
+            self.removeEdge(n1, n2)
+
+    def edges(self):
+        return sorted(self.active)
+
+    #
+    # Color the current graph, returns "found", "nonexistent" or "error"
+    # and the colors of the nodes in increasing order of their labels.
+    # The labels need not be 1..n, unlike in checkSolution, so the model
+    # is decoded over a Graph of the current nodes directly.
+    #
+    def solve(self):
+        metrics = self.metrics
+        if self.solution is None:
+            metrics.startPhase("encode")
+            if hasattr(self.s, "set_initial_value"):
+                for (n, c) in self.colorof.items():
+                    self.s.set_initial_value(self.colorVars(n, c), True)
+            metrics.startPhase("solve")
+            result = self.s.check([edgeon(*e) for e in self.active])
+            metrics.solverStatistics(self.s)
+            metrics.startPhase("decode")
+            if result == sat:
+                graph = Graph(self.edges(), nodes = sorted(self.nodes))
+                (values, defined, colors) = readColors(self.s.model(), graph,
+                                                       self.nofColors,
+                                                       colorVars = self.colorVars)
+                (problem, colors) = coloringProblem(graph, values, defined)
+                if problem is not None:
+                    raise ValidationError(problem)
+                self.colorof = dict([(n, int(colors[i]))
+                                     for (i, n) in enumerate(graph.nodes)])
+                self.solution = "found"
+            elif result == unsat:
+                self.solution = "nonexistent"
+            else:
+                # Not cached, the next solve checks again
+                metrics.endPhase()
+                return ("error", [])
+            metrics.endPhase()
+        return (self.solution, self.colors())
+
+    def colors(self):
+        if self.solution != "found":
+            return []
+        return [self.colorof[n] for n in sorted(self.nodes)]
@@ -0,0 +1,131 @@
+import math
+import random
+
+#
+# Seeded random instance generators for the solver modules.
+#
+# Every generator takes a seed and returns an instance in the format the
+# corresponding entry point expects, so the same seed always gives the
+# same instance:
+#
+# - graphs for colorGraph and findCliques are lists of (n1,n2) edges with
+#   n1 < n2 and nodes numbered continuously starting from 1
+# - voting instances for findVotes are (majorities, minorities) pairs of
+#   lists of groups, each group a list of persons
+# - bucket instances for solveWithBMC and solveWithIncrementalBMC are
+#   (bucketCapacities, goal) pairs
+# - parity games for solveParity are (edges, initialNode, eNodes, omega)
+#   tuples where the edges are [v,w] lists and every node has a successor
+#
+
+# Renumber the nodes of an undirected edge list to 1..n, keeping their order
+
+def relabel(edges):
+    nodes = sorted(set([n for e in edges for n in e]))
+    index = dict([(n, i+1) for (i, n) in enumerate(nodes)])
+    return [(index[n1], index[n2]) for (n1, n2) in edges]
+
+
+# Erdos-Renyi graph G(n,p); isolated nodes are dropped
+
+def erdosRenyiGraph(nofNodes, density, seed = 0):
+    assert(nofNodes >= 2)
+    rng = random.Random(seed)
+    edges = [(n1, n2) for n1 in range(1, nofNodes+1)
+             for n2 in range(n1+1, nofNodes+1) if rng.random() < density]
+    if edges == []:
+        edges = [(1, 2)]
+    return relabel(edges)
+
+
+# Random geometric graph: nodes are points in the unit square and two
+# nodes are connected iff their distance is at most radius
+
+def geometricGraph(nofNodes, radius, seed = 0):
+    assert(nofNodes >= 2)
+    rng = random.Random(seed)
+    points = [(rng.random(), rng.random()) for n in range(nofNodes)]
+    edges = []
+    for i in range(nofNodes):
+        for j in range(i+1, nofNodes):
+            (x1, y1) = points[i]
+            (x2, y2) = points[j]
+            if math.hypot(x1-x2, y1-y2) <= radius:
+                edges.append((i+1, j+1))
+    if edges == []:
+        edges = [(1, 2)]
+    return relabel(edges)
+
+
+# Overlapping groups of persons: every group takes a random window of
+# the electorate plus some persons from anywhere, so neighbouring groups
+# share most of their members
+
+def overlappingGroups(nofPersons, nofGroups, groupSize, seed = 0,
+                      majorityFraction = 0.5):
+    assert(2 <= groupSize <= nofPersons)
+    rng = random.Random(seed)
+    majorities = []
+    minorities = []
+    for g in range(nofGroups):
+        start = rng.randint(1, nofPersons - groupSize + 1)
+        window = list(range(start, start + groupSize))
+        stray = rng.sample(range(1, nofPersons+1), groupSize // 4)
+        group = sorted(set(window[:groupSize - len(stray)] + stray))
+        if rng.random() < majorityFraction:
+            majorities.append(group)
+        else:
+            minorities.append(group)
+    return (majorities, minorities)
+
+
+# Random bucket capacities with a goal below the largest capacity
+
+def bucketInstance(nofBuckets, maxCapacity, seed = 0):
+    assert(nofBuckets >= 1 and maxCapacity >= 2)
+    rng = random.Random(seed)
+    bucketCapacities = [rng.randint(2, maxCapacity) for b in range(nofBuckets)]
+    goal = rng.randint(1, max(bucketCapacities) - 1)
+    return (bucketCapacities, goal)
+
+
+# Random two-priority parity game where every node has outDegree
+# successors.  One successor of each node is the next node on a ring,
+# so that every node also has an incoming edge.
+
+def randomParityGame(nofNodes, outDegree, seed = 0, eloiseFraction = 0.5):
+    assert(nofNodes >= 2 and 1 <= outDegree < nofNodes)
+    rng = random.Random(seed)
+    nodes = list(range(1, nofNodes+1))
+    edges = []
+    for v in nodes:
+        nxt = v % nofNodes + 1
+        others = [w for w in nodes if w != v and w != nxt]
+        for w in [nxt] + rng.sample(others, outDegree-1):
+            edges.append([v, w])
+    eNodes = [v for v in nodes if rng.random() < eloiseFraction]
+    omega = dict([(v, rng.randint(0, 1)) for v in nodes])
+    return (edges, 1, eNodes, omega)
+
+
+# Ladder-shaped game: two rails of the given length joined by rungs,
+# both rails loop back to the start.  Eloise owns the upper rail, the
+# priorities alternate along the rails and are randomized on the rungs.
+
+def ladderParityGame(length, seed = 0):
+    assert(length >= 2)
+    rng = random.Random(seed)
+    upper = list(range(1, length+1))
+    lower = list(range(length+1, 2*length+1))
+    edges = []
+    for i in range(length):
+        nxt = (i+1) % length
+        edges.append([upper[i], upper[nxt]])
+        edges.append([lower[i], lower[nxt]])
+        edges.append([upper[i], lower[i]])
+        edges.append([lower[i], upper[i]])
+    omega = {}
+    for i in range(length):
+        omega[upper[i]] = i % 2
+        omega[lower[i]] = rng.randint(0, 1)
+    return (edges, upper[0], list(upper), omega)
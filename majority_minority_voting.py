@@ -1,6 +1,12 @@
 from z3 import *
 import sys
-# STUDENTS: do not add or modify import statements!
+import multiprocessing
+import itertools
+import numpy as np
+from metrics import ensureMetrics
+from variables import VarCache, VarTable
+from clauses import clause, conjunction, negation, atLeast, atMost, modelValues
+from validation import votingProblem
 
 # The parts that you should fill in are marked with "INSERT YOUR CODE HERE"
 
@@ -20,7 +26,7 @@ def count(g, n, l):
 # Define the Boolean variable cnt_g_n_l recursively
 # Note that persons[] should be indexed by l-1 rather than l
 
-def countFormula(g, n, l, persons):
+def countFormula(g, n, l, persons, vote = vote, count = count):
     if n == 1:
         if l == 1:
             return count(g, n, l) == vote(persons[0])
@@ -38,11 +44,11 @@ def countFormula(g, n, l, persons):
 
 # Count votes up to the given limit in a recursive fashion
 
-def countVotesFormula(group, limit, persons):
+def countVotesFormula(group, limit, persons, vote = vote, count = count):
     definitions = []
     for n in range(1,limit+1):                    # Count up to given limit
         for l in range(n,n+len(persons)-limit+1): # Indexing persons
-            definitions.append(countFormula(group, n, l, persons))
+            definitions.append(countFormula(group, n, l, persons, vote, count))
     if definitions == []:
         return False
     else:
@@ -50,18 +56,171 @@ def countVotesFormula(group, limit, persons):
 
 # Ensure the clear majority of "yea" votes for the given group of persons
 
-def testMajority(group, persons):
+def testMajority(group, persons, vote = vote, count = count):
     n = len(persons)
     k = n//2+1 
    
-    return And(countVotesFormula(group, k, persons), count(group, k, n)) 
+    return And(countVotesFormula(group, k, persons, vote, count), count(group, k, n))
 
 # Ensure the clear minority of "yea" votes for the given group of persons
 
-def testMinority(group, persons):
+def testMinority(group, persons, vote = vote, count = count):
     n = len(persons)
     k = (n-1)//2 + 1 # INSERT YOUR CODE HERE
-    return And(countVotesFormula(group, k, persons), Not(count(group,k,n))) # INSERT YOUR CODE HERE
+    return And(countVotesFormula(group, k, persons, vote, count), Not(count(group,k,n))) # INSERT YOUR CODE HERE
+
+# Shared totalizers (counting = "totalizer" in findVotes).
+#
+# The groups overlap heavily, and the counters above are built for each
+# group from scratch.  Instead, the persons are split into atoms: the
+# persons that belong to exactly the same groups.  Every group is the
+# disjoint union of its atoms.  Each atom gets a totalizer, a balanced
+# binary tree whose nodes count the "yea" votes of the persons below
+# them, and the totalizer of a group merges the totalizers of its atoms.
+# Nodes are identified by the persons they cover, so a node is built only
+# once however many groups use it: the atoms are shared by all their
+# groups, and the groups take their atoms in one global order (the atoms
+# in most groups first) so that merges of common atoms are shared too.
+# Groups with the same persons are encoded once.
+#
+# The Boolean variable tot_i_j of node i means that at least j persons
+# below node i vote "yea".  Each node only counts up to the largest
+# threshold any group asks of it, and its clauses define tot_i_j in both
+# directions, so that a group can require either "at least k" or "less
+# than k".
+#
+# A person listed twice in a group counts twice, as in the other
+# countings and in checkSolution.  The leaves are therefore occurrences
+# (p, c), the (c+1)th listing of person p in a group, whose vote is that
+# of p: an occurrence belongs to the groups listing p more than c times.
+
+def total(node, j):
+    return Bool("tot_%d_%d" % (node, j))
+
+# The occurrences of the persons of a group
+
+def occurrences(group):
+    seen = {}
+    result = []
+    for p in group:
+        c = seen.get(p, 0)
+        seen[p] = c+1
+        result.append((p, c))
+    return result
+
+class Totalizer:
+    def __init__(self, groups, vote = vote, total = total):
+        self.vote = vote
+        self.total = total
+        self.nodes = []
+        self.ids = {}
+        self.roots = {}
+
+        persons = {}
+        for (g, group) in enumerate(groups):
+            for o in occurrences(group):
+                persons.setdefault(o, []).append(g)
+        atoms = {}
+        for o in sorted(persons):
+            atoms.setdefault(tuple(persons[o]), []).append(o)
+        order = sorted(atoms, key = lambda sig: (-len(sig), sig))
+        groupAtoms = [[] for g in groups]
+        for sig in order:
+            for g in sig:
+                groupAtoms[g].append(tuple(atoms[sig]))
+
+        for (g, group) in enumerate(groups):
+            key = tuple(sorted(occurrences(group)))
+            if key not in self.roots:
+                self.roots[key] = self.merge(groupAtoms[g])
+        self.limits = [0] * len(self.nodes)
+
+    # A node is (occurrences, children) with children either a pair of
+    # node ids or the person of the occurrence for a leaf
+
+    def node(self, persons, children):
+        if persons not in self.ids:
+            self.ids[persons] = len(self.nodes)
+            self.nodes.append((persons, children))
+        return self.ids[persons]
+
+    def merge(self, atoms):
+        if len(atoms) == 0:
+            # The count of an empty group, at least k is false for k > 0
+            return self.node((), None)
+        if len(atoms) == 1:
+            return self.leaves(atoms[0])
+        half = len(atoms)//2
+        (left, right) = (self.merge(atoms[:half]), self.merge(atoms[half:]))
+        persons = self.nodes[left][0] + self.nodes[right][0]
+        return self.node(persons, (left, right))
+
+    def leaves(self, persons):
+        if len(persons) == 1:
+            return self.node(persons, persons[0][0])
+        half = len(persons)//2
+        (left, right) = (self.leaves(persons[:half]), self.leaves(persons[half:]))
+        return self.node(persons, (left, right))
+
+    def root(self, group):
+        return self.roots[tuple(sorted(occurrences(group)))]
+
+    # Ask for the count of the group up to k
+
+    def require(self, group, k):
+        i = self.root(group)
+        self.limits[i] = max(self.limits[i], min(k, len(self.nodes[i][0])))
+
+    # At least j persons below node i vote "yea" (j <= the limit of i)
+
+    def atLeast(self, i, j):
+        (persons, children) = self.nodes[i]
+        if j == 0:
+            return True
+        if j > len(persons):
+            return False
+        if not isinstance(children, tuple):
+            return self.vote(children)
+        return self.total(i, j)
+
+    def groupAtLeast(self, group, k):
+        return self.atLeast(self.root(group), k)
+
+    # The clauses of all the nodes, once every group has asked for its
+    # count.  A parent is larger than its children, so the limits are
+    # passed down in the order of decreasing size.
+
+    def formulas(self):
+        byDecreasingSize = sorted(range(len(self.nodes)),
+                                  key = lambda i: -len(self.nodes[i][0]))
+        for i in byDecreasingSize:
+            children = self.nodes[i][1]
+            if isinstance(children, tuple):
+                for c in children:
+                    size = len(self.nodes[c][0])
+                    self.limits[c] = max(self.limits[c], min(self.limits[i], size))
+        clauses = []
+        for i in byDecreasingSize:
+            (persons, children) = self.nodes[i]
+            limit = self.limits[i]
+            if limit == 0 or not isinstance(children, tuple):
+                continue
+            (a, b) = children
+            rangeA = range(min(len(self.nodes[a][0]), limit)+1)
+            rangeB = range(min(len(self.nodes[b][0]), limit)+1)
+            for x in rangeA:
+                for y in rangeB:
+                    # x below a and y below b make at least x+y below i
+                    if x+y >= 1:
+                        literals = [negation(self.atLeast(n, m))
+                                    for (n, m) in [(a, x), (b, y)] if m > 0]
+                        clauses.append(clause(literals + [self.atLeast(i, min(x+y, limit))]))
+                    # at most x below a and y below b make at most x+y below i
+                    if x+y+1 <= limit:
+                        literals = [self.atLeast(n, m+1) for (n, m) in [(a, x), (b, y)]
+                                    if m+1 <= len(self.nodes[n][0])]
+                        clauses.append(clause(literals + [negation(self.atLeast(i, x+y+1))]))
+        return clauses
 
 # The rest of the program
 
@@ -71,7 +230,8 @@ class ValidationError(Exception):
     def __str__(self):
         return repr(self.value)
 
-def checkSolution(majorities, minorities, persons, model, out = sys.stdout):
+def checkSolution(majorities, minorities, persons, model, out = sys.stdout,
+                  vote = vote, electorate = None, complete = False):
     """
     Print (and validate) the solution found 
     """
@@ -79,54 +239,164 @@ def checkSolution(majorities, minorities, persons, model, out = sys.stdout):
     def p(txt):
         if(out): out.write(txt+"\n")
 
-    def countvotes(group, votes):
-        cnt = 0
-        for m in group:
-            if m in votes:
-                cnt +=1
-        return cnt
-
-    def majority(group, votes):
-        if countvotes(group, votes) >= len(group)//2+1:
-            return True
-
-    def minority(group, votes):
-        if countvotes(group, votes) < (len(group)-1)//2+1:
-            return True
+    if electorate is None:
+        electorate = Electorate(majorities+minorities)
 
-    # Extract votes from the model
+    # Extract votes from the model.  With complete, the persons the model
+    # leaves undefined vote "nay", as in a completed model.
     votes = []
-    for p in persons:
-        var = vote(p)
-        val = model[var]
-        if val == None:
+    yeas = np.zeros(electorate.nofPersons(), dtype = bool)
+    index = electorate.index
+    for (p, value) in zip(persons, modelValues(model, [vote(p) for p in persons])):
+        if value == None and not complete:
             raise ValidationError("The value of yea_%d is not defined!" % (p))
-        elif is_true(val):
+        elif value:
             votes.append(p)
+            if p in index:
+                yeas[index[p]] = True
 
-    # Check majority groups
-    for maj in majorities:
-        if not majority(maj, votes):
-            raise ValidationError("Group %s has no majority!" % (maj))
-
-    # Check minority groups
-    for min1 in minorities:
-        if not minority(min1, votes):
-            raise ValidationError("Group %s is not in minority!" % (min1))
+    # Check majority and minority groups, see validation.py
+    nofMaj = len(majorities)
+    problem = votingProblem(electorate, yeas, range(nofMaj),
+                            range(nofMaj, nofMaj+len(minorities)))
+    if problem is not None:
+        raise ValidationError(problem)
 
     return votes
         
-def findVotes(majorities, minorities, out = sys.stdout):
+# Native cardinality constraints (counting = "native" in findVotes): the
+# thresholds are stated with Z3's AtLeast and AtMost over the votes of
+# the group (built through the C API, see clauses.py) and left to the
+# cardinality solver, without any auxiliary variables.
 
-    nofMaj = len(majorities)
-    nofMin = len(minorities)
-    groups = majorities+minorities
-    nofg = len(groups)
+def nativeMajority(persons, vote = vote):
+    n = len(persons)
+    return atLeast([vote(p) for p in persons], n//2+1)
+
+def nativeMinority(persons, vote = vote):
+    n = len(persons)
+    return atMost([vote(p) for p in persons], (n-1)//2)
+
+#
+# Find votes such that every majority group has a clear majority of
+# "yea" votes and every minority group has not.  counting is one of
+# COUNTINGS: "sequential" builds the counter cnt_g_n_l of each group,
+# "totalizer" the shared totalizers above and "native" Z3's cardinality
+# constraints.
+#
+
+COUNTINGS = ("sequential", "totalizer", "native")
+
+# The persons of the groups in the order of their first appearance
+
+def groupPersons(groups):
     persons = []
+    seen = set()
     for g in groups:
       for p in g:
-          if p not in persons:
+          if p not in seen:
+              seen.add(p)
               persons.append(p)
+    return persons
+
+#
+# The groups as a sparse group x person incidence matrix, for ingesting
+# and validating large electorates in linear time.
+#
+# The persons are relabeled to dense indices 0..P-1 in the order of their
+# first appearance in the groups (the order of groupPersons), persons[i]
+# is the label of index i and index[label] the other way round.  The
+# members of group g are members[offsets[g]:offsets[g+1]], as indices, in
+# compressed sparse row form; a person listed twice in a group counts
+# twice, as in checkSolution.  The relabeling is done with NumPy on the
+# flattened membership list instead of a dictionary lookup per member.
+#
+
+class Electorate:
+    def __init__(self, groups):
+        sizes = np.fromiter((len(g) for g in groups), dtype = np.int64,
+                            count = len(groups))
+        self.offsets = np.zeros(len(groups)+1, dtype = np.int64)
+        np.cumsum(sizes, out = self.offsets[1:])
+        labels = np.fromiter(itertools.chain.from_iterable(groups),
+                             dtype = np.int64, count = self.offsets[-1])
+        (distinct, first, inverse) = np.unique(labels, return_index = True,
+                                               return_inverse = True)
+        order = np.argsort(first)
+        rank = np.empty(len(order), dtype = np.int64)
+        rank[order] = np.arange(len(order))
+        self.members = rank[inverse.reshape(-1)]
+        self.persons = distinct[order].tolist()
+        self.index = dict(zip(self.persons, range(len(self.persons))))
+
+    def nofGroups(self):
+        return len(self.offsets)-1
+
+    def nofPersons(self):
+        return len(self.persons)
+
+    # The members of group g as indices and as labels
+
+    def memberIndices(self, g):
+        return self.members[self.offsets[g]:self.offsets[g+1]]
+
+    def group(self, g):
+        persons = self.persons
+        return [persons[i] for i in self.memberIndices(g)]
+
+# Add the majority and minority constraints of the groups to the solver
+
+def encodeVotes(s, majorities, minorities, counting, voteVars, metrics):
+    groups = majorities+minorities
+    countVars = VarCache(count)
+    g = 1
+
+    if counting == "totalizer":
+        totalizer = Totalizer(groups, voteVars, VarCache(total))
+        for maj in majorities:
+            totalizer.require(maj, len(maj)//2+1)
+        for min1 in minorities:
+            totalizer.require(min1, (len(min1)-1)//2+1)
+        s.add(metrics.formula("totalizerFormula", conjunction(totalizer.formulas())))
+        required = set()
+        for maj in majorities:
+            k = len(maj)//2+1
+            if (k, totalizer.root(maj)) not in required:
+                required.add((k, totalizer.root(maj)))
+                s.add(metrics.formula("testMajority", totalizer.groupAtLeast(maj, k)))
+        for min1 in minorities:
+            k = (len(min1)-1)//2+1
+            if (-k, totalizer.root(min1)) not in required:
+                required.add((-k, totalizer.root(min1)))
+                s.add(metrics.formula("testMinority", Not(totalizer.groupAtLeast(min1, k))))
+
+    elif counting == "native":
+        for maj in majorities:
+            s.add(metrics.formula("nativeMajority", nativeMajority(maj, voteVars)))
+        for min1 in minorities:
+            s.add(metrics.formula("nativeMinority", nativeMinority(min1, voteVars)))
+
+    else:
+        for maj in majorities:
+            s.add(metrics.formula("testMajority", testMajority(g, maj, voteVars, countVars)))
+            g += 1
+
+        for min1 in minorities:
+            s.add(metrics.formula("testMinority", testMinority(g, min1, voteVars, countVars)))
+            g += 1
+
+def findVotes(majorities, minorities, out = sys.stdout, metrics = None,
+              counting = "sequential"):
+    assert(counting in COUNTINGS)
+    metrics = ensureMetrics(metrics)
+    metrics.startPhase("encode")
+
+    nofMaj = len(majorities)
+    nofMin = len(minorities)
+    groups = majorities+minorities
+    nofg = len(groups)
+    electorate = Electorate(groups)
+    persons = electorate.persons
     nofp = len(persons)
     assert(nofg > 0)
     assert(nofp > 1)
@@ -151,18 +421,14 @@ def findVotes(majorities, minorities, out = sys.stdout):
 
     # Create one solver instance that we'll use all the time
     s = Solver()
-    g = 1
-
-    for maj in majorities:
-        s.add(testMajority(g, maj))
-        g += 1
-
-    for min1 in minorities:
-        s.add(testMinority(g, min1))
-        g += 1
+    voteVars = VarTable(vote, persons)
+    encodeVotes(s, majorities, minorities, counting, voteVars, metrics)
 
     votes = []
+    metrics.startPhase("solve")
     result = s.check()
+    metrics.solverStatistics(s)
+    metrics.startPhase("decode")
     p("The solver says: "+str(result))
 
     if result == unsat:
@@ -171,7 +437,11 @@ def findVotes(majorities, minorities, out = sys.stdout):
 
     elif result == sat:
         model = s.model()
-        votes = checkSolution(majorities, minorities, persons, model)
+        # Persons whose votes do not matter may be left open by the model,
+        # they vote "nay"
+        votes = checkSolution(majorities, minorities, persons, model,
+                              vote = voteVars, electorate = electorate,
+                              complete = True)
         p("Votes in the assignment: %s" % votes)
         solution = "found"
 
@@ -182,5 +452,207 @@ def findVotes(majorities, minorities, out = sys.stdout):
           '") returned by the solver, aborting!')
         solution = "error"
 
+    metrics.endPhase()
     return (solution, votes)
 
+
+#
+# Enumerate all the vote assignments, as a generator of the lists of the
+# persons voting "yea" (in the order of their first appearance in the
+# groups).  After each solution a blocking clause over the yea_p
+# variables excludes exactly that assignment, so every assignment of the
+# persons is produced once.  Each solution is validated with
+# checkSolution as it is produced and only the current model is kept.
+#
+# limit stops the enumeration after that many solutions.  fixed is a list
+# of (person, vote) pairs that all the solutions must agree with, they
+# are passed to the solver as assumptions.
+#
+
+def enumerateVotes(majorities, minorities, counting = "native", limit = None,
+                   metrics = None, fixed = []):
+    assert(counting in COUNTINGS)
+    metrics = ensureMetrics(metrics)
+    metrics.startPhase("encode")
+
+    electorate = Electorate(majorities+minorities)
+    persons = electorate.persons
+    s = Solver()
+    voteVars = VarTable(vote, persons)
+    encodeVotes(s, majorities, minorities, counting, voteVars, metrics)
+    assumptions = [voteVars(p) if yea else Not(voteVars(p)) for (p, yea) in fixed]
+
+    found = 0
+    while limit is None or found < limit:
+        metrics.startPhase("solve")
+        result = s.check(assumptions)
+        metrics.solverStatistics(s)
+        metrics.startPhase("decode")
+        if result != sat:
+            if result == unknown:
+                raise Exception("unknown (with reason %s) returned by the solver"
+                                % s.reason_unknown())
+            break
+        votes = checkSolution(majorities, minorities, persons, s.model(), None,
+                              voteVars, electorate, complete = True)
+        found += 1
+        metrics.setInfo("solutions", found)
+        yeas = set(votes)
+        metrics.startPhase("encode")
+        s.add(clause([negation(voteVars(p)) if p in yeas else voteVars(p)
+                      for p in persons]))
+        metrics.endPhase()
+        yield votes
+    metrics.endPhase()
+
+# Count the solutions of one cube, run in a worker process
+
+def countCube(args):
+    (majorities, minorities, counting, cube) = args
+    found = 0
+    for votes in enumerateVotes(majorities, minorities, counting, fixed = cube):
+        found += 1
+    return found
+
+#
+# Count the vote assignments by cube and conquer: the votes of the
+# cubeDepth persons that are in the most groups are fixed in all 2^depth
+# ways, and the solutions of each such cube are enumerated separately.
+# The cubes are counted on a pool of processes worker processes, or one
+# after the other in this process by default.  The default depth makes
+# four cubes per process.
+#
+
+def countVotes(majorities, minorities, counting = "native", processes = None,
+               cubeDepth = None, metrics = None):
+    metrics = ensureMetrics(metrics)
+    metrics.startPhase("split")
+
+    groups = majorities+minorities
+    memberships = {}
+    for g in groups:
+        for p in set(g):
+            memberships[p] = memberships.get(p, 0) + 1
+    persons = groupPersons(groups)
+    if cubeDepth is None:
+        cubeDepth = (4*(processes or 1)-1).bit_length()
+    cubeDepth = min(cubeDepth, len(persons))
+    split = sorted(persons, key = lambda p: -memberships[p])[:cubeDepth]
+    cubes = [[(p, bool(c >> i & 1)) for (i, p) in enumerate(split)]
+             for c in range(2**cubeDepth)]
+    metrics.setInfo("cubes", len(cubes))
+
+    metrics.startPhase("solve")
+    tasks = [(majorities, minorities, counting, cube) for cube in cubes]
+    if processes is None:
+        counts = [countCube(task) for task in tasks]
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(processes) as pool:
+            counts = list(pool.imap_unordered(countCube, tasks))
+    metrics.endPhase()
+    return sum(counts)
+
+#
+# What-if queries over a fixed list of groups.
+#
+# A session encodes the majority and the minority constraint of every
+# group once, each behind its own selector literal: majsel_g (minsel_g)
+# implies that group g has a clear majority (is in minority).  A query
+# names the groups that must be majorities and those that must be
+# minorities by their positions in the list, and is answered by one
+# check of the same solver with the selectors of those roles assumed.
+# Everything the solver learns carries over between the queries.
+#
+# check() returns ("found", votes) with the persons voting "yea", or
+# ("nonexistent", (majorities, minorities)) with an unsat core: positions
+# of groups whose roles already conflict among themselves.
+#
+
+def majsel(group):
+    return Bool("majsel_%d" % (group))
+
+def minsel(group):
+    return Bool("minsel_%d" % (group))
+
+class VotingSession:
+    def __init__(self, groups, counting = "native", metrics = None):
+        assert(counting in COUNTINGS)
+        self.metrics = ensureMetrics(metrics)
+        self.metrics.startPhase("encode")
+        self.groups = [list(g) for g in groups]
+        self.electorate = Electorate(self.groups)
+        self.persons = self.electorate.persons
+        self.voteVars = VarTable(vote, self.persons)
+        self.majVars = VarTable(majsel, range(len(self.groups)))
+        self.minVars = VarTable(minsel, range(len(self.groups)))
+        self.roles = {}
+        self.s = Solver()
+        self.s.set("core.minimize", True)
+
+        if counting == "totalizer":
+            totalizer = Totalizer(self.groups, self.voteVars, VarCache(total))
+            for group in self.groups:
+                totalizer.require(group, len(group)//2+1)
+                totalizer.require(group, (len(group)-1)//2+1)
+            self.s.add(self.metrics.formula("totalizerFormula",
+                                            conjunction(totalizer.formulas())))
+
+        countVars = VarCache(count)
+        for (g, group) in enumerate(self.groups):
+            if counting == "totalizer":
+                n = len(group)
+                majority = totalizer.groupAtLeast(group, n//2+1)
+                minority = Not(totalizer.groupAtLeast(group, (n-1)//2+1))
+            elif counting == "native":
+                majority = nativeMajority(group, self.voteVars)
+                minority = nativeMinority(group, self.voteVars)
+            else:
+                # A counter only counts up to its limit: one for each role
+                majority = testMajority(2*g+1, group, self.voteVars, countVars)
+                minority = testMinority(2*g+2, group, self.voteVars, countVars)
+            self.s.add(self.metrics.formula("testMajority",
+                                            Implies(self.majVars(g), majority)))
+            self.s.add(self.metrics.formula("testMinority",
+                                            Implies(self.minVars(g), minority)))
+            self.roles[self.majVars(g).get_id()] = ("majority", g)
+            self.roles[self.minVars(g).get_id()] = ("minority", g)
+        self.metrics.endPhase()
+
+    def check(self, majorities = [], minorities = []):
+        metrics = self.metrics
+        metrics.startPhase("solve")
+        result = self.s.check([self.majVars(g) for g in majorities] +
+                              [self.minVars(g) for g in minorities])
+        metrics.solverStatistics(self.s)
+        metrics.startPhase("decode")
+
+        if result == unsat:
+            core = ([], [])
+            for selector in self.s.unsat_core():
+                (role, g) = self.roles[selector.get_id()]
+                core[0 if role == "majority" else 1].append(g)
+            solution = ("nonexistent", (sorted(core[0]), sorted(core[1])))
+
+        elif result == sat:
+            # Only the persons of the queried groups are decoded, and
+            # those the model leaves undefined may vote either way
+            electorate = self.electorate
+            queried = np.unique(np.concatenate(
+                [np.zeros(0, dtype = np.int64)] +
+                [electorate.memberIndices(g) for g in list(majorities)+list(minorities)]))
+            values = modelValues(self.s.model(),
+                                 [self.voteVars(self.persons[i]) for i in queried])
+            yeas = np.zeros(electorate.nofPersons(), dtype = bool)
+            yeas[queried[np.array(values, dtype = bool)]] = True
+            problem = votingProblem(electorate, yeas, majorities, minorities)
+            if problem is not None:
+                raise ValidationError(problem)
+            solution = ("found", [self.persons[i] for i in np.nonzero(yeas)[0]])
+
+        else:
+            assert(result == unknown)
+            solution = ("error", self.s.reason_unknown())
+
+        metrics.endPhase()
+        return solution
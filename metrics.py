@@ -0,0 +1,139 @@
+from z3 import *
+import time
+
+#
+# Optional instrumentation of the solve functions.
+#
+# A solve function that is given a Metrics object marks the start of each
+# of its phases ("encode", "solve", "decode") with startPhase; starting a
+# phase ends the previous one.  Phases that are entered several times,
+# e.g. once per bound in bounded model checking, accumulate their time.
+#
+# The formulas added to the solver are passed through formula(), which
+# records the size of each constraint family (e.g. "oneColorFormula" or
+# "coloringConditionFormula"): the number of distinct AST nodes and of
+# distinct variables.  Subterms shared between the formulas of a family
+# are counted once.  Walking the formulas takes time of its own, often
+# more than building them, so the clock of the current phase is stopped
+# while a formula is sized; the time spent sizing is reported separately
+# as "sizing".  With sizeFormulas=False the formulas are only counted.
+# After each s.check() the solve function calls
+# solverStatistics(s) to accumulate the statistics of the solver
+# (conflicts, decisions, memory, ...).  Counters are summed over the
+# checks, memory figures keep their maximum.
+#
+# setInfo records other facts about the run, e.g. which stage of the
+# solve function answered the instance.
+#
+# asDict() returns everything as plain dictionaries, ready for json.
+#
+
+class Metrics:
+    def __init__(self, sizeFormulas = True):
+        self.sizeFormulas = sizeFormulas
+        self.sizing = 0.0
+        self.phases = {}
+        self.currentPhase = None
+        self.phaseStarted = None
+        self.formulas = {}
+        self.formulaNodes = {}
+        self.formulaVars = {}
+        self.statistics = {}
+        self.checks = 0
+        self.info = {}
+
+    def startPhase(self, name):
+        self.endPhase()
+        self.currentPhase = name
+        self.phaseStarted = time.perf_counter()
+
+    def endPhase(self):
+        if self.currentPhase is not None:
+            elapsed = time.perf_counter() - self.phaseStarted
+            self.phases[self.currentPhase] = \
+                self.phases.get(self.currentPhase, 0.0) + elapsed
+            self.currentPhase = None
+
+    def phaseTime(self, name):
+        return self.phases.get(name, 0.0)
+
+    # Record the size of a formula of the given family and return the
+    # formula unchanged, so that the call can wrap the argument of s.add
+
+    def formula(self, family, f):
+        if family not in self.formulas:
+            self.formulas[family] = 0
+            self.formulaNodes[family] = set()
+            self.formulaVars[family] = set()
+        self.formulas[family] += 1
+        if not self.sizeFormulas:
+            return f
+        started = time.perf_counter()
+        nodes = self.formulaNodes[family]
+        variables = self.formulaVars[family]
+        todo = [f if is_expr(f) else BoolVal(f)]
+        while todo != []:
+            e = todo.pop()
+            if e.get_id() in nodes:
+                continue
+            nodes.add(e.get_id())
+            if is_const(e) and e.decl().kind() == Z3_OP_UNINTERPRETED:
+                variables.add(e.get_id())
+            todo.extend(e.children())
+        elapsed = time.perf_counter() - started
+        self.sizing += elapsed
+        if self.currentPhase is not None:
+            self.phaseStarted += elapsed
+        return f
+
+    def solverStatistics(self, s):
+        self.checks += 1
+        st = s.statistics()
+        for key in st.keys():
+            value = st.get_key_value(key)
+            if "memory" in key:
+                self.statistics[key] = max(self.statistics.get(key, 0), value)
+            else:
+                self.statistics[key] = self.statistics.get(key, 0) + value
+
+    def setInfo(self, key, value):
+        self.info[key] = value
+
+    def formulaSizes(self):
+        return dict([(family, {"formulas": self.formulas[family],
+                               "nodes": len(self.formulaNodes[family]),
+                               "vars": len(self.formulaVars[family])})
+                     for family in self.formulas])
+
+    def asDict(self):
+        return {"phases": dict(self.phases),
+                "sizing": self.sizing,
+                "formulas": self.formulaSizes(),
+                "statistics": dict(self.statistics),
+                "checks": self.checks,
+                "info": dict(self.info)}
+
+
+# Stand-in used when the caller does not want any instrumentation
+
+class NoMetrics(Metrics):
+    def startPhase(self, name):
+        pass
+
+    def endPhase(self):
+        pass
+
+    def formula(self, family, f):
+        return f
+
+    def solverStatistics(self, s):
+        pass
+
+    def setInfo(self, key, value):
+        pass
+
+
+def ensureMetrics(metrics):
+    if metrics is None:
+        return NoMetrics()
+    return metrics
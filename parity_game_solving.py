@@ -1,6 +1,9 @@
 from z3 import *
 import sys
-# STUDENTS: do not add or modify import statements!
+from cardinality import exactlyOneFormula
+from metrics import ensureMetrics
+from variables import VarTable, KeyedVarTable
+from graph import Graph
 
 #
 # Some auxiliary functions are defined first, it is probably a good idea
@@ -8,22 +11,6 @@ import sys
 # The parts that you should fill are marked with "INSERT YOUR CODE HERE".
 #
 
-#
-# Return a formula that evaluates to true if and only if
-# exactly one of the argument formulas evaluates to true.
-# This is a straightforward, quadratic construction; better ones do exist.
-#
-def exactlyOneFormula(formulas):
-    if len(formulas) == 0: return False
-    if len(formulas) == 1: return formulas[0]
-    atLeastOne = Or(formulas)
-    atLeastTwo = Or([And(f1,f2) for f1 in formulas for f2 in formulas if f2 is not f1])
-    # Note: we have to use "is not" instead of "!=" above because
-    # f2 != f1 would be a Z3 formula "f2 != f1" and here we want to check
-    # whether f2 is not the same as f1
-    return And(atLeastOne, Not(atLeastTwo))
-
-
 # States of the game guessed to be reachable are
 # represented for node v with a Boolean variable
 # "S_n"
@@ -48,25 +35,26 @@ def xv(v):
 
 # The initial node must be in the game
 
-def forceInitialNode(initialNode):
+def forceInitialNode(initialNode, sv = sv):
     return sv(initialNode)
 
 # Eloise should guess exactly one outgoing edge for
 # each guessed to be reachable eNode
 
-def guessEloiseStrategy(eNodes, nodeOutEdges):
+def guessEloiseStrategy(eNodes, nodeOutEdges, encoding = "pairwise",
+                        sv = sv, tvw = tvw):
     guesses = []
     for v in eNodes:
         out = nodeOutEdges[v]
         outsv = [tvw(v,w) for w in out]
-        guesses.append(Implies(sv(v),exactlyOneFormula(outsv)))
+        guesses.append(Implies(sv(v),exactlyOneFormula(outsv, encoding)))
     return And(guesses)
 
 
 # Abelard nodes that have been guessed to be reachable
 # will force also all their outgoing edges to be reachable
 
-def forceAbelardSuccessors(aNodes, nodeOutEdges):
+def forceAbelardSuccessors(aNodes, nodeOutEdges, sv = sv, tvw = tvw):
     guesses = []
     for v in aNodes:
         out = nodeOutEdges[v]
@@ -78,7 +66,7 @@ def forceAbelardSuccessors(aNodes, nodeOutEdges):
 # Force nodes with guessed reachable incoming edges
 # to also be guessed to be reachable
 
-def forceNodesWithIncomingEdges(nodes, nodeInEdges):
+def forceNodesWithIncomingEdges(nodes, nodeInEdges, sv = sv, tvw = tvw):
     guesses = []
     for w in nodes:
         inn = nodeInEdges[w]
@@ -90,7 +78,7 @@ def forceNodesWithIncomingEdges(nodes, nodeInEdges):
 # Remove all models which contain a guessed to be reachable
 # loop consisting of only nodes with priority 1
 
-def removeAbelardWins(omega, edges):
+def removeAbelardWins(omega, edges, tvw = tvw, xv = xv):
     removes = []
     for e in edges:
         (v, w) = e
@@ -109,7 +97,8 @@ class ValidationError(Exception):
 # Checking code to ensure the found model is a valid games strategy with which Eloise can win
     
 def checkSolution(edges, initialNode, nodes, eNodes, aNodes, omega, 
-                  nodeOutEdges, nodeInEdges, model, out = sys.stdout):
+                  nodeOutEdges, nodeInEdges, model, out = sys.stdout,
+                  sv = sv, tvw = tvw):
     """
     Print (and validate) the solution found 
     """
@@ -259,12 +248,7 @@ def checkSolution(edges, initialNode, nodes, eNodes, aNodes, omega,
 # Extract the set of nodes given a list of edges
 
 def extractNodes(edges):
-    nodes = []
-    for e in edges:
-      (n1,n2) = e
-      if n1 not in nodes: nodes.append(n1)
-      if n2 not in nodes: nodes.append(n2)
-    return nodes
+    return Graph(edges, True).nodes
 
 # Solve a two-player parity game with two priorities 0 and 1
 # - edges is the directed edge relation given as a list of (src,dst) pairs
@@ -286,35 +270,32 @@ def extractNodes(edges):
 #   and then to add constraints which remove all models that contain
 #   a loop where Abelard would win
 
-def solveParity(edges, initialNode, eNodes, omega, out = sys.stdout):
+def solveParity(edges, initialNode, eNodes, omega, out = sys.stdout,
+                encoding = "pairwise", metrics = None):
+    metrics = ensureMetrics(metrics)
+    metrics.startPhase("encode")
 
     nofEdges = len(edges)
     assert(nofEdges >= 1)
 
-    nodes = extractNodes(edges)
+    graph = Graph(edges, True)
+    reverse = Graph([(w, v) for (v, w) in edges], True)
+    nodes = list(graph.nodes)
     nofNodes = len(nodes)
 
-    assert initialNode in nodes
+    assert initialNode in graph.index
     assert(len(omega) == nofNodes)
     assert(len(eNodes) <= nofNodes)
 
+    # Every node must have a successor
     for n in nodes:
-        found = False
-        for e in edges:
-            (n1,n2) = e
-            if (n1 == n):
-                found = True
-                break
-        if(found == False):
-            assert(False)
+        assert(graph.degree(n) > 0)
 
     for en in eNodes:
-        assert(en in nodes)
+        assert(en in graph.index)
 
-    aNodes = []
-    for n in nodes:
-        if n not in eNodes:
-            aNodes.append(n)
+    eNodeSet = set(eNodes)
+    aNodes = [n for n in nodes if n not in eNodeSet]
 
     nodes.sort()
     eNodes.sort()
@@ -324,25 +305,12 @@ def solveParity(edges, initialNode, eNodes, omega, out = sys.stdout):
     omegaKeys.sort()
 
     for n in omegaKeys:
-        assert(n in nodes)
+        assert(n in graph.index)
         o = omega[n]
         assert ((o == 0) or (o == 1))
 
-    nodeOutEdges = {}
-    for e in edges:
-        (v, w) = e
-        if v not in nodeOutEdges:
-            nodeOutEdges[v] = [w]
-        else:
-            nodeOutEdges[v].append(w)
-
-    nodeInEdges = {}
-    for e in edges:
-        (v, w) = e
-        if w not in nodeInEdges:
-            nodeInEdges[w] = [v]
-        else:
-            nodeInEdges[w].append(v)
+    nodeOutEdges = dict([(v, graph.neighbors(v)) for v in nodes])
+    nodeInEdges = dict([(w, reverse.neighbors(w)) for w in nodes])
 
     # Helper functions
     def p(txt):
@@ -361,22 +329,33 @@ def solveParity(edges, initialNode, eNodes, omega, out = sys.stdout):
 
     # Create one solver instance that we'll use all the time
     s = Solver()
+    svVars = VarTable(sv, nodes)
+    tvwVars = KeyedVarTable(tvw, edges)
+    xvVars = VarTable(xv, nodes)
 
-    s.add(forceInitialNode(initialNode))
+    s.add(metrics.formula("forceInitialNode", forceInitialNode(initialNode, svVars)))
 
     if (len(eNodes) > 0):
-        s.add(guessEloiseStrategy(eNodes, nodeOutEdges))
+        s.add(metrics.formula("guessEloiseStrategy",
+                               guessEloiseStrategy(eNodes, nodeOutEdges, encoding,
+                                                   svVars, tvwVars)))
 
     if (len(aNodes) > 0):
-        s.add(forceAbelardSuccessors(aNodes, nodeOutEdges))
+        s.add(metrics.formula("forceAbelardSuccessors",
+                               forceAbelardSuccessors(aNodes, nodeOutEdges, svVars, tvwVars)))
 
-    s.add(forceNodesWithIncomingEdges(nodes, nodeInEdges))
+    s.add(metrics.formula("forceNodesWithIncomingEdges",
+                           forceNodesWithIncomingEdges(nodes, nodeInEdges, svVars, tvwVars)))
 
-    s.add(removeAbelardWins(omega, edges))
+    s.add(metrics.formula("removeAbelardWins",
+                          removeAbelardWins(omega, edges, tvwVars, xvVars)))
     
     #    print s
 
+    metrics.startPhase("solve")
     result = s.check()
+    metrics.solverStatistics(s)
+    metrics.startPhase("decode")
     p("The solver says: "+str(result))
 
     strategy = {}
@@ -391,7 +370,8 @@ def solveParity(edges, initialNode, eNodes, omega, out = sys.stdout):
         #        print model
         
         strategy = checkSolution(edges, initialNode, nodes, eNodes, aNodes, 
-                                 omega, nodeOutEdges, nodeInEdges, model, out)
+                                 omega, nodeOutEdges, nodeInEdges, model, out,
+                                 svVars, tvwVars)
 
         p("Eloise wins!")
         solution = "found"
@@ -405,6 +385,7 @@ def solveParity(edges, initialNode, eNodes, omega, out = sys.stdout):
 
     if (len(strategy) != 0):
         p("Winning strategy for Eloise is: %s" % (str(strategy)))
-        
+
+    metrics.endPhase()
     return (solution,strategy)
 
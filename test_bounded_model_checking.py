@@ -0,0 +1,36 @@
+import io
+import re
+import pytest
+import instances
+from bounded_model_checking import solveWithBMC, solveWithIncrementalBMC
+
+#
+# The explicit-state search (engine "bfs", which "auto" picks for these
+# small instances) against the SAT encodings: the same answer and a plan
+# of the same, shortest, length.
+#
+
+def planLength(output):
+    return len(re.findall(r"  State \d+:", output))
+
+def solve(solver, instance, maxBound, engine):
+    out = io.StringIO()
+    solution = solver(instance, maxBound, out, engine = engine)
+    return (solution, planLength(out.getvalue()))
+
+INSTANCES = ([instances.bucketInstance(n, 7, seed) for n in (1, 2, 3) for seed in range(6)] +
+             [([3], 0), ([2, 2], 0), ([0, 3], 0), ([3], 3), ([4, 6], 3), ([2, 2], 2)])
+
+@pytest.mark.parametrize("solver", [solveWithBMC, solveWithIncrementalBMC])
+@pytest.mark.parametrize("instance", INSTANCES)
+def test_bfs_agrees_with_sat(solver, instance):
+    for maxBound in (3, 6):
+        assert solve(solver, instance, maxBound, "bfs") == \
+               solve(solver, instance, maxBound, "sat")
+
+
+def test_bfs_on_goal_zero_and_unreachable_goal():
+    assert solve(solveWithBMC, ([3], 0), 5, "bfs") == ("found", 1)
+    assert solve(solveWithBMC, ([2, 2], 0), 5, "bfs") == ("found", 2)
+    assert solve(solveWithBMC, ([4, 6], 3), 8, "bfs") == ("not found", 0)
+    assert solve(solveWithBMC, ([4, 6], 3), 8, "auto") == ("not found", 0)
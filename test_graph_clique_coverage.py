@@ -0,0 +1,51 @@
+import itertools
+import pytest
+import instances
+from graph_clique_coverage import findCliques
+
+#
+# findCliques, with and without symmetry breaking, against brute force
+# over the maximal cliques of small random graphs: the edges can be
+# covered by k distinct maximal cliques iff some k of them cover all the
+# edges.
+#
+
+def maximalCliques(nodes, edges):
+    adjacent = set(edges) | set((n2, n1) for (n1, n2) in edges)
+    def complete(c):
+        return all((n1, n2) in adjacent for (n1, n2) in itertools.combinations(c, 2))
+    result = []
+    for size in range(1, len(nodes)+1):
+        for c in itertools.combinations(nodes, size):
+            if complete(c) and \
+               not any(complete(c + (n,)) for n in nodes if n not in c):
+                result.append(set(c))
+    return result
+
+def coverable(edges, cliques, k):
+    return any(all(any(n1 in c and n2 in c for c in subset) for (n1, n2) in edges)
+               for subset in itertools.combinations(cliques, k))
+
+def isCover(edges, cliques, maximal):
+    return len(set(frozenset(c) for c in cliques)) == len(cliques) and \
+           all(set(c) in maximal for c in cliques) and \
+           all(any(n1 in c and n2 in c for c in cliques) for (n1, n2) in edges)
+
+
+@pytest.mark.parametrize("symmetryBreaking", [False, True])
+@pytest.mark.parametrize("backend", ["membership", "setcover"])
+def test_findCliques_agrees_with_brute_force(symmetryBreaking, backend):
+    for seed in range(8):
+        edges = instances.erdosRenyiGraph(7, 0.5, seed)
+        if not edges:
+            continue
+        nodes = sorted(set(n for e in edges for n in e))
+        maximal = maximalCliques(nodes, edges)
+        for k in range(1, len(maximal)+2):
+            (solution, cliques) = findCliques(edges, k, None,
+                                              symmetryBreaking = symmetryBreaking,
+                                              backend = backend)
+            expected = coverable(edges, maximal, k)
+            assert solution == ("found" if expected else "nonexistent"), (seed, k)
+            if expected:
+                assert len(cliques) == k and isCover(edges, cliques, maximal)
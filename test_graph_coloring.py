@@ -0,0 +1,58 @@
+from z3 import set_param
+import instances
+from graph_coloring import IncrementalColoring, chromaticNumber
+
+#
+# IncrementalColoring with node labels that are not 1..n
+#
+
+def test_incremental_coloring_with_label_gaps():
+    coloring = IncrementalColoring(3, [(1, 5)])
+    (solution, colors) = coloring.solve()
+    assert solution == "found" and len(colors) == 2 and colors[0] != colors[1]
+
+    coloring.addEdges([(5, 9), (1, 9), (9, 100)])
+    (solution, colors) = coloring.solve()
+    assert solution == "found"
+    colorof = dict(zip([1, 5, 9, 100], colors))
+    for (n1, n2) in coloring.edges():
+        assert colorof[n1] != colorof[n2]
+
+
+def test_incremental_coloring_odd_cycle_with_label_gaps():
+    coloring = IncrementalColoring(2, [(2, 7), (7, 11), (11, 2)])
+    assert coloring.solve() == ("nonexistent", [])
+    coloring.removeEdge(11, 2)
+    assert coloring.solve()[0] == "found"
+
+
+def test_incremental_coloring_does_not_cache_errors():
+    coloring = IncrementalColoring(3, instances.erdosRenyiGraph(70, 0.5, 1))
+    coloring.s.set("timeout", 1)
+    assert coloring.solve() == ("error", [])
+    coloring.s.set("timeout", 4294967295)
+    coloring.removeEdges(coloring.edges())
+    coloring.addEdge(1, 2)
+    (solution, colors) = coloring.solve()
+    assert solution == "found" and colors[0] != colors[1]
+
+
+#
+# chromaticNumber reports whether the number of colors is proven minimal
+#
+
+def test_chromatic_number_of_odd_cycle():
+    (solution, k, colors) = chromaticNumber([(1, 2), (2, 3), (3, 4), (4, 5), (5, 1)], None)
+    assert (solution, k) == ("optimal", 3)
+
+
+def test_chromatic_number_timeout_is_not_optimal():
+    edges = instances.erdosRenyiGraph(70, 0.5, 1)
+    set_param("timeout", 1)
+    try:
+        (solution, k, colors) = chromaticNumber(edges, None)
+    finally:
+        set_param("timeout", 4294967295)
+    assert solution == "found"
+    assert k == max(colors)+1
+
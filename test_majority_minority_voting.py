@@ -0,0 +1,74 @@
+import itertools
+import random
+import pytest
+from majority_minority_voting import findVotes, countVotes, VotingSession, COUNTINGS
+
+#
+# The counting modes of findVotes against brute force over all the vote
+# assignments of small random instances.  The groups may list a person
+# more than once, such a person counts once per listing.
+#
+
+def randomInstance(rng):
+    nofPersons = rng.randint(2, 6)
+    def group():
+        return [rng.randint(1, nofPersons) for i in range(rng.randint(1, 5))]
+    majorities = [group() for g in range(rng.randint(0, 3))]
+    minorities = [group() for g in range(rng.randint(0, 3))]
+    return (majorities, minorities)
+
+def bruteForce(majorities, minorities):
+    persons = sorted(set(p for g in majorities+minorities for p in g))
+    solutions = 0
+    for votes in itertools.product([False, True], repeat = len(persons)):
+        yeas = set(p for (p, yea) in zip(persons, votes) if yea)
+        def count(group):
+            return len([p for p in group if p in yeas])
+        if (all(count(g) >= len(g)//2+1 for g in majorities) and
+            all(count(g) < (len(g)-1)//2+1 for g in minorities)):
+            solutions += 1
+    return solutions
+
+def instancesWithPersons(seed, number):
+    rng = random.Random(seed)
+    result = []
+    while len(result) < number:
+        (majorities, minorities) = randomInstance(rng)
+        if len(set(p for g in majorities+minorities for p in g)) > 1:
+            result.append((majorities, minorities))
+    return result
+
+
+@pytest.mark.parametrize("counting", COUNTINGS)
+def test_findVotes_agrees_with_brute_force(counting):
+    for (majorities, minorities) in instancesWithPersons(0, 150):
+        expected = "found" if bruteForce(majorities, minorities) > 0 else "nonexistent"
+        (solution, votes) = findVotes(majorities, minorities, None, counting = counting)
+        assert solution == expected, (majorities, minorities)
+
+
+@pytest.mark.parametrize("counting", COUNTINGS)
+def test_duplicate_members_count_twice(counting):
+    (solution, votes) = findVotes([[1, 1, 2, 3]], [[2, 3, 4]], None, counting = counting)
+    assert solution == "found"
+    assert 1 in votes
+
+
+@pytest.mark.parametrize("counting", COUNTINGS)
+def test_countVotes_agrees_with_brute_force(counting):
+    for (majorities, minorities) in instancesWithPersons(1, 40):
+        assert countVotes(majorities, minorities, counting) == \
+               bruteForce(majorities, minorities), (majorities, minorities)
+
+
+@pytest.mark.parametrize("counting", COUNTINGS)
+def test_empty_groups(counting):
+    for (majorities, minorities) in [([[], [1, 2]], []), ([[1, 2]], [[]]),
+                                     ([[1, 2], []], [[3]]), ([[1, 2]], [[], [3]])]:
+        assert findVotes(majorities, minorities, None, counting = counting) == \
+               ("nonexistent", [])
+        assert countVotes(majorities, minorities, counting) == 0
+    session = VotingSession([[], [1, 2], [3]], counting = counting)
+    assert session.check(majorities = [0]) == ("nonexistent", ([0], []))
+    assert session.check(minorities = [0]) == ("nonexistent", ([], [0]))
+    assert session.check(majorities = [1], minorities = [2])[0] == "found"
@@ -0,0 +1,211 @@
+from z3 import *
+import numpy as np
+from clauses import modelValues, modelNumerals
+
+#
+# Full validation of coloring and clique cover solutions with array
+# operations.
+#
+# The model is read once into a Boolean matrix with one row per node and
+# one column per color (or clique).  The variables are those of the
+# solve, variables(n, c) being the one of (node n, column c), e.g. the
+# VarTable over (node, color) of colorGraph, whose rows are taken as they
+# are; their values are read through the C API (modelValues in
+# clauses.py).  A second matrix records which entries the model defines
+# at all.  The edges are taken from the CSR arrays of a Graph, so all the
+# checks below are a few vectorized passes over the matrix and the edge
+# list.  The bit-vector colors of the binary color encoding are read the
+# same way into a vector of integers.
+#
+# The check functions return a description of the first problem found,
+# or None when the solution is valid; the solver modules raise their own
+# ValidationError with it.
+#
+
+def readMatrix(model, graph, nofColumns, variables):
+    if hasattr(variables, "row") and len(variables.dims) == 2 and \
+       variables.dims[1] == list(range(nofColumns)):
+        row = variables.row
+    else:
+        row = lambda n: [variables(n, c) for c in range(nofColumns)]
+    cells = modelValues(model, [var for n in graph.nodes for var in row(n)])
+    shape = (graph.nofNodes(), nofColumns)
+    values = np.array([value == True for value in cells], dtype = bool).reshape(shape)
+    defined = np.array([value is not None for value in cells], dtype = bool).reshape(shape)
+    return (values, defined)
+
+
+# The values of the bit-vector variables variables(n) of the nodes, as
+# integers in the order of graph.nodes
+
+def readBitVectors(model, graph, variables):
+    numbers = modelNumerals(model, [variables(n) for n in graph.nodes])
+    values = np.array([0 if number is None else number for number in numbers],
+                      dtype = np.int64)
+    defined = np.array([number is not None for number in numbers], dtype = bool)
+    return (values, defined)
+
+
+# Both ends of every edge as index arrays, each undirected edge once
+
+def edgeArrays(graph):
+    targets = np.frombuffer(graph.targets, dtype = graph.targets.typecode)
+    degrees = np.frombuffer(graph.degrees, dtype = graph.degrees.typecode)
+    sources = np.repeat(np.arange(graph.nofNodes()), degrees)
+    once = sources < targets
+    return (sources[once], targets[once])
+
+
+def firstUndefined(graph, defined, prefix):
+    (rows, columns) = np.nonzero(~defined)
+    if len(rows) > 0:
+        return "The model does not define the value of %s%d_%d properly!" \
+               % (prefix, graph.nodes[rows[0]], columns[0])
+    return None
+
+
+#
+# Check a node x color matrix.  Returns (problem, colors) where colors
+# holds the color of each node in the order of graph.nodes.
+#
+def coloringProblem(graph, values, defined):
+    problem = firstUndefined(graph, defined, "hascol_")
+    if problem is not None:
+        return (problem, None)
+    nofColorsOf = values.sum(axis = 1)
+    uncolored = np.nonzero(nofColorsOf == 0)[0]
+    if len(uncolored) > 0:
+        return ("The model does not determine the color of node %d!"
+                % graph.nodes[uncolored[0]], None)
+    multiple = np.nonzero(nofColorsOf > 1)[0]
+    if len(multiple) > 0:
+        (c1, c2) = np.nonzero(values[multiple[0]])[0][:2]
+        return ("Node %d has two colors %d and %d!"
+                % (graph.nodes[multiple[0]], c1, c2), None)
+    colors = values.argmax(axis = 1)
+    return (conflictProblem(graph, colors), colors)
+
+
+#
+# Check the bit-vector colors of the binary color encoding
+#
+def binaryColoringProblem(graph, values, defined, nofColors):
+    undefined = np.nonzero(~defined)[0]
+    if len(undefined) > 0:
+        return ("The model does not define the value of col_%d properly!"
+                % graph.nodes[undefined[0]], None)
+    outside = np.nonzero(values >= nofColors)[0]
+    if len(outside) > 0:
+        return ("Node %d has the color %d, there are only %d colors!"
+                % (graph.nodes[outside[0]], values[outside[0]], nofColors), None)
+    return (conflictProblem(graph, values), values)
+
+
+#
+# Check a node x color matrix of the order encoding, where column c
+# tells whether the color is at least c (column 0 is not used)
+#
+def orderColoringProblem(graph, values, defined):
+    (rows, columns) = np.nonzero(~defined[:, 1:])
+    if len(rows) > 0:
+        return ("The model does not define the value of colge_%d_%d properly!"
+                % (graph.nodes[rows[0]], columns[0]+1), None)
+    (rows, columns) = np.nonzero(values[:, 2:] & ~values[:, 1:-1])
+    if len(rows) > 0:
+        return ("The color of node %d is at least %d but not at least %d!"
+                % (graph.nodes[rows[0]], columns[0]+2, columns[0]+1), None)
+    colors = values[:, 1:].sum(axis = 1)
+    return (conflictProblem(graph, colors), colors)
+
+
+# The edges whose ends have the same color, as index arrays
+
+def conflictingEdges(graph, colors):
+    (sources, targets) = edgeArrays(graph)
+    conflicts = colors[sources] == colors[targets]
+    return (sources[conflicts], targets[conflicts])
+
+
+# No edge may connect two nodes of the same color
+
+def conflictProblem(graph, colors):
+    (sources, targets) = conflictingEdges(graph, colors)
+    if len(sources) > 0:
+        (i, j) = (sources[0], targets[0])
+        return "Nodes %d and %d are connected but have the same color %d!" \
+               % (graph.nodes[i], graph.nodes[j], colors[i])
+    return None
+
+
+#
+# Check a node x clique matrix: every clique is non-empty, complete and
+# maximal, no two cliques are equal and every edge is covered.
+#
+def cliqueCoverProblem(graph, values, defined):
+    problem = firstUndefined(graph, defined, "member_")
+    if problem is not None:
+        return problem
+    sizes = values.sum(axis = 0)
+    empty = np.nonzero(sizes == 0)[0]
+    if len(empty) > 0:
+        return "Clique %d is empty!" % (empty[0])
+
+    (sources, targets) = edgeArrays(graph)
+    bothIn = values[sources] & values[targets]
+
+    # A clique of m nodes is complete iff it contains m(m-1)/2 edges
+    inside = bothIn.sum(axis = 0)
+    incomplete = np.nonzero(inside != sizes*(sizes-1)//2)[0]
+    if len(incomplete) > 0:
+        return "Clique %d is not complete!" % (incomplete[0])
+
+    # A complete clique is maximal iff no node outside it is connected
+    # to all of its members
+    adjacentMembers = np.zeros(values.shape, dtype = np.int64)
+    np.add.at(adjacentMembers, sources, values[targets])
+    np.add.at(adjacentMembers, targets, values[sources])
+    (rows, columns) = np.nonzero(~values & (adjacentMembers == sizes))
+    if len(rows) > 0:
+        return "Clique %d is not maximal, node %d could be added to it!" \
+               % (columns[0], graph.nodes[rows[0]])
+
+    distinct = np.unique(values.T, axis = 0)
+    if len(distinct) < values.shape[1]:
+        return "The cover contains the same clique twice!"
+
+    uncovered = np.nonzero(~bothIn.any(axis = 1))[0]
+    if len(uncovered) > 0:
+        return "The edge (%d,%d) is not covered by any clique!" \
+               % (graph.nodes[sources[uncovered[0]]], graph.nodes[targets[uncovered[0]]])
+    return None
+
+
+#
+# Validation of vote assignments against the groups of an Electorate
+# (see majority_minority_voting.py).  yeas is a Boolean vector over the
+# dense person indices.  The numbers of "yea" votes of all the groups are
+# the product of the group x person incidence matrix, stored in CSR form
+# as offsets and members, with the vote vector: the members' votes are
+# summed once and the count of a group is the difference of the running
+# sum at the ends of its row.  majorities and minorities are the rows of
+# the groups to check in each role.
+#
+
+def groupCounts(electorate, yeas):
+    running = np.zeros(len(electorate.members)+1, dtype = np.int64)
+    np.cumsum(yeas[electorate.members], out = running[1:])
+    return running[electorate.offsets[1:]] - running[electorate.offsets[:-1]]
+
+
+def votingProblem(electorate, yeas, majorities, minorities):
+    counts = groupCounts(electorate, yeas)
+    sizes = np.diff(electorate.offsets)
+    majorities = np.asarray(majorities, dtype = np.int64)
+    minorities = np.asarray(minorities, dtype = np.int64)
+    failed = majorities[counts[majorities] < sizes[majorities]//2+1]
+    if len(failed) > 0:
+        return "Group %s has no majority!" % electorate.group(failed[0])
+    failed = minorities[counts[minorities] >= (sizes[minorities]-1)//2+1]
+    if len(failed) > 0:
+        return "Group %s is not in minority!" % electorate.group(failed[0])
+    return None
@@ -0,0 +1,99 @@
+#
+# Interned variables for the encodings.
+#
+# The variable factories of the solver modules (hascol, member, vote,
+# ...) format a name and create a Z3 constant on every call, and the
+# encoders call them over and over for the same arguments.  A solve
+# function wraps such a factory in a table that creates each variable
+# once and hands out the same Z3 term afterwards.  The tables are
+# callable with the same arguments as the factory, so the formula
+# functions and checkSolution take them in place of the factory: the
+# factory is an optional last argument that defaults to the module's
+# own, and the solve functions (colorGraph, findCliques, findVotes,
+# solveParity, ...) pass their tables there.
+#
+# - VarCache memoizes the factory in a dictionary, for families whose
+#   index space is sparse (e.g. the counters of the voting encoding)
+# - VarTable keeps the variables in a dense array indexed by the
+#   positions of the arguments in the given dimensions, e.g. (node, color)
+#   with the nodes in the order of the node list and colors 0..k-1
+# - KeyedVarTable is a dense array over an explicit list of argument
+#   tuples, e.g. the edges of a graph
+#
+# The variables of a dense table are created on first use.  The tables
+# live as long as the solve that created them.
+#
+
+class VarCache:
+    def __init__(self, make):
+        self.make = make
+        self.vars = {}
+
+    def __call__(self, *key):
+        var = self.vars.get(key)
+        if var is None:
+            var = self.vars[key] = self.make(*key)
+        return var
+
+    # The variables created so far
+
+    def created(self):
+        return list(self.vars.values())
+
+
+class VarTable:
+    def __init__(self, make, *dims):
+        self.make = make
+        self.dims = [list(d) for d in dims]
+        self.index = [dict([(k, i) for (i, k) in enumerate(d)]) for d in self.dims]
+        size = 1
+        for d in self.dims:
+            size *= len(d)
+        self.vars = [None] * size
+
+    # Position of the variable for the given arguments in the dense array
+
+    def position(self, key):
+        pos = 0
+        for (index, k) in zip(self.index, key):
+            pos = pos*len(index) + index[k]
+        return pos
+
+    def __call__(self, *key):
+        return self.at(self.position(key))
+
+    def at(self, pos):
+        var = self.vars[pos]
+        if var is None:
+            key = []
+            rest = pos
+            for d in reversed(self.dims):
+                key.append(d[rest % len(d)])
+                rest //= len(d)
+            var = self.vars[pos] = self.make(*reversed(key))
+        return var
+
+    def created(self):
+        return [var for var in self.vars if var is not None]
+
+    # The variables for the given leading arguments, e.g. all the color
+    # variables of one node, in the order of the last dimension
+
+    def row(self, *prefix):
+        length = len(self.dims[-1])
+        start = self.position(prefix) * length
+        return [self.at(pos) for pos in range(start, start+length)]
+
+
+class KeyedVarTable(VarTable):
+    def __init__(self, make, keys):
+        VarTable.__init__(self, make, [tuple(k) for k in keys])
+
+    def position(self, key):
+        return self.index[0][key]
+
+    def at(self, pos):
+        var = self.vars[pos]
+        if var is None:
+            var = self.vars[pos] = self.make(*self.dims[0][pos])
+        return var